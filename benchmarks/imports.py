@@ -0,0 +1,157 @@
+"""
+Benchmark the cost of importing django_sns_view.
+
+Run from the repository root:
+
+    python -m benchmarks.imports
+    python -m benchmarks.imports --json results.json
+    python -m benchmarks.imports --compare results.json
+
+Each module is imported in a fresh interpreter after django.setup(), with
+-X importtime, and reported as the median cumulative import time over
+--repeat runs along with the heavy dependencies the import loaded. The
+"warmup" row times django_sns_view.utils.warmup after importing the views,
+which is what a worker with SNS_WARMUP set pays for when it starts.
+"""
+
+from typing import Any
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = (
+    "django_sns_view.views",
+    "django_sns_view.utils",
+    "django_sns_view.types",
+)
+HEAVY_PACKAGES = ("pydantic", "pydantic_core", "requests", "cryptography")
+
+SETUP = (
+    "import os, django; "
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', "
+    "'django_sns_view.tests.settings'); "
+    "django.setup(); "
+)
+WARMUP = (
+    "import sys, time, django_sns_view.views; "
+    "from django_sns_view.utils import warmup; "
+    "start = time.perf_counter(); warmup(); "
+    "print(int((time.perf_counter() - start) * 1e6)); "
+    "print(' '.join(sys.modules))"
+)
+
+
+def import_once(module: str) -> tuple[float, list[str]]:
+    """
+    Import module in a fresh interpreter, returning its cumulative import
+    time in microseconds and the heavy packages it loaded.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SETUP + "import " + module],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = 0.0
+    loaded = set()
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        if name == module:
+            cumulative = float(total)
+        if name.split(".")[0] in HEAVY_PACKAGES:
+            loaded.add(name.split(".")[0])
+    return cumulative, sorted(loaded)
+
+
+def warmup_once() -> tuple[float, list[str]]:
+    """
+    Run warmup in a fresh interpreter that imported the views, returning
+    how long it took in microseconds and the heavy packages loaded.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", SETUP + WARMUP],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, modules = result.stdout.splitlines()[-2:]
+    loaded = {name.split(".")[0] for name in modules.split()}
+    return float(elapsed), sorted(loaded.intersection(HEAVY_PACKAGES))
+
+
+def run(repeat: int) -> dict[str, dict[str, Any]]:
+    results: dict[str, dict[str, Any]] = {}
+    for module in MODULES:
+        timings = []
+        loaded: list[str] = []
+        for _ in range(repeat):
+            cumulative, loaded = import_once(module)
+            timings.append(cumulative)
+        results[module] = {
+            "median_ms": statistics.median(timings) / 1e3,
+            "min_ms": min(timings) / 1e3,
+            "loaded": loaded,
+        }
+    timings = []
+    for _ in range(repeat):
+        elapsed, loaded = warmup_once()
+        timings.append(elapsed)
+    results["warmup"] = {
+        "median_ms": statistics.median(timings) / 1e3,
+        "min_ms": min(timings) / 1e3,
+        "loaded": loaded,
+    }
+    return results
+
+
+def report(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]] | None = None,
+) -> None:
+    header = "%-24s %10s %10s  %s" % ("module", "median ms", "min ms", "loaded")
+    if baseline is not None:
+        header += "  vs base"
+    print(header)
+    for module, result in results.items():
+        line = "%-24s %10.1f %10.1f  %s" % (
+            module,
+            result["median_ms"],
+            result["min_ms"],
+            ",".join(result["loaded"]) or "-",
+        )
+        if baseline is not None and module in baseline:
+            line += "  %+.1f%%" % (
+                (result["median_ms"] / baseline[module]["median_ms"] - 1) * 100
+            )
+        print(line)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--compare", help="Compare against results from --json")
+    args = parser.parse_args(argv)
+
+    # The interpreters are started from the repository root
+    os.environ.setdefault("PYTHONPATH", os.getcwd())
+    results = run(args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,363 @@
+"""
+Load test an SNSEndpoint with a fake SNS publisher.
+
+Run from the repository root:
+
+    python -m benchmarks.loadtest --rate 200 --duration 10
+    python -m benchmarks.loadtest --url http://localhost:8000/sns/ --concurrency 32
+
+Notifications, SubscriptionConfirmations and UnsubscribeConfirmations are
+signed with a local key, and a stand-in HTTP server on localhost serves the
+SigningCertURL and answers SubscribeURL requests, so no AWS access is
+needed.
+
+Without --url the requests are made in process against an SNSEndpoint whose
+handler sleeps for --handler-ms. With --url they are posted to a running
+deployment, which must accept certificates and subscriptions from the
+stand-in server, e.g. with SNS_CERT_DOMAIN_REGEX and
+SNS_SUBSCRIBE_DOMAIN_REGEX set to r"^localhost$".
+
+Requests are sent at --rate per second by --concurrency workers. Latency is
+measured from when each request was scheduled to be sent, so it includes
+any time spent waiting for a free worker.
+"""
+
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_sns_view.tests.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from django.test import RequestFactory, override_settings  # noqa: E402
+import requests  # noqa: E402
+
+from django_sns_view.dedup import LocMemDeduplicator  # noqa: E402
+from django_sns_view.tests.helpers import make_certificate, sign_payload  # noqa: E402
+from django_sns_view.tests.test_data.notifications import (  # noqa: E402
+    SNS_NOTIFICATION,
+    SNS_SUBSCRIPTION_NOTIFICATION,
+    SNS_UNSUBSCRIBE_NOTIFICATION,
+)
+from django_sns_view.types import Notification  # noqa: E402
+from django_sns_view.views import SNSEndpoint  # noqa: E402
+
+TOPIC_ARN = "arn:aws:sns:us-east-1:123456789012:loadtest"
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Serves the signing certificate at /cert.pem and counts the requests made
+    to SubscribeURL (/confirm) and UnsubscribeURL (/unsubscribe).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, pem: bytes) -> None:
+        super().__init__(("localhost", 0), StandInHandler)
+        self.pem = pem
+        self.counts: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return "http://localhost:%s" % self.server_address[1]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server: StandInServer
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        with self.server.lock:
+            self.server.counts[path] = self.server.counts.get(path, 0) + 1
+        if path == "/cert.pem":
+            body = self.server.pem
+        elif path in ("/confirm", "/unsubscribe"):
+            body = b"<ConfirmSubscriptionResponse/>"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class LoadTestEndpoint(SNSEndpoint):
+    handler_seconds = 0.0
+
+    def handle_message(self, message: str, notification: Notification) -> None:
+        if self.handler_seconds:
+            time.sleep(self.handler_seconds)
+
+
+class Publisher:
+    """
+    Builds signed SNS requests, resending a previous request instead of a
+    new one for duplicate_ratio of them like an SNS retry would.
+    """
+
+    def __init__(
+        self,
+        key: rsa.RSAPrivateKey,
+        base_url: str,
+        sizes: list[int],
+        signature_versions: list[str],
+        duplicate_ratio: float,
+        confirmation_ratio: float,
+        unsubscribe_ratio: float,
+    ) -> None:
+        self.key = key
+        self.base_url = base_url
+        self.sizes = sizes
+        self.signature_versions = signature_versions
+        self.duplicate_ratio = duplicate_ratio
+        self.confirmation_ratio = confirmation_ratio
+        self.unsubscribe_ratio = unsubscribe_ratio
+        self.sent: list[tuple[dict[str, str], bytes]] = []
+        self.lock = threading.Lock()
+
+    def next_request(self) -> tuple[dict[str, str], bytes]:
+        with self.lock:
+            if self.sent and random.random() < self.duplicate_ratio:
+                return random.choice(self.sent)
+        request = self.build()
+        with self.lock:
+            # Keep a bounded window of requests to redeliver
+            if len(self.sent) >= 1000:
+                self.sent[random.randrange(1000)] = request
+            else:
+                self.sent.append(request)
+        return request
+
+    def build(self) -> tuple[dict[str, str], bytes]:
+        roll = random.random()
+        payload: dict[str, Any]
+        common = {
+            "MessageId": str(uuid.uuid4()),
+            "TopicArn": TOPIC_ARN,
+            "Timestamp": datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z",
+            "SigningCertURL": self.base_url + "/cert.pem",
+        }
+        if roll < self.confirmation_ratio:
+            payload = dict(
+                SNS_SUBSCRIPTION_NOTIFICATION,
+                SubscribeURL=self.base_url + "/confirm?Token=loadtest",
+                **common,
+            )
+        elif roll < self.confirmation_ratio + self.unsubscribe_ratio:
+            payload = dict(
+                SNS_UNSUBSCRIBE_NOTIFICATION,
+                SubscribeURL=self.base_url + "/confirm?Token=loadtest",
+                **common,
+            )
+        else:
+            payload = dict(
+                SNS_NOTIFICATION,
+                Message="x" * random.choice(self.sizes),
+                UnsubscribeURL=self.base_url + "/unsubscribe",
+                **common,
+            )
+        payload = sign_payload(
+            payload, self.key, signature_version=random.choice(self.signature_versions)
+        )
+        headers = {
+            "x-amz-sns-message-type": payload["Type"],
+            "x-amz-sns-message-id": payload["MessageId"],
+            "x-amz-sns-topic-arn": TOPIC_ARN,
+        }
+        return headers, json.dumps(payload).encode()
+
+
+def http_sender(url: str, timeout: float) -> Callable[[dict[str, str], bytes], int]:
+    sessions = threading.local()
+
+    def send(headers: dict[str, str], body: bytes) -> int:
+        if not hasattr(sessions, "session"):
+            sessions.session = requests.Session()
+        response = sessions.session.post(
+            url,
+            data=body,
+            headers=dict(headers, **{"Content-Type": "text/plain; charset=UTF-8"}),
+            timeout=timeout,
+        )
+        status: int = response.status_code
+        return status
+
+    return send
+
+
+def in_process_sender(
+    handler_seconds: float,
+) -> Callable[[dict[str, str], bytes], int]:
+    factory = RequestFactory()
+    endpoint = LoadTestEndpoint.as_view(
+        handler_seconds=handler_seconds, deduplicator=LocMemDeduplicator()
+    )
+
+    def send(headers: dict[str, str], body: bytes) -> int:
+        request = factory.post("/", body, content_type="text/plain; charset=UTF-8")
+        for name, value in headers.items():
+            request.META["HTTP_" + name.upper().replace("-", "_")] = value
+        return endpoint(request).status_code
+
+    return send
+
+
+def run(
+    send: Callable[[dict[str, str], bytes], int],
+    publisher: Publisher,
+    rate: float,
+    duration: float,
+    concurrency: int,
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    lock = threading.Lock()
+    total = int(rate * duration)
+
+    def request(scheduled: float) -> None:
+        headers, body = publisher.next_request()
+        try:
+            status = str(send(headers, body))
+        except Exception as e:
+            status = type(e).__name__
+        latency = time.perf_counter() - scheduled
+        with lock:
+            latencies.append(latency)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(total):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(request, scheduled)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if status != "200")
+    result: dict[str, Any] = {
+        "requests": len(latencies),
+        "elapsed_s": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "error_rate": errors / len(latencies) if latencies else 0.0,
+        "statuses": statuses,
+    }
+    if latencies:
+        result["mean_ms"] = statistics.fmean(latencies) * 1e3
+        for p in PERCENTILES:
+            index = min(len(latencies) - 1, int(len(latencies) * p / 100))
+            result["p%s_ms" % p] = latencies[index] * 1e3
+        result["max_ms"] = latencies[-1] * 1e3
+    return result
+
+
+def report(result: dict[str, Any]) -> None:
+    print(
+        "%d requests in %.2fs, %.1f/s"
+        % (result["requests"], result["elapsed_s"], result["throughput"])
+    )
+    print("error rate %.2f%%" % (result["error_rate"] * 100))
+    for status, count in sorted(result["statuses"].items()):
+        print("  %-24s %d" % (status, count))
+    if result["requests"]:
+        print(
+            "latency ms: "
+            + " ".join(
+                "%s=%.2f" % (name, result["%s_ms" % name])
+                for name in ["mean"] + ["p%s" % p for p in PERCENTILES] + ["max"]
+            )
+        )
+    for path, count in sorted(result["stand_in_requests"].items()):
+        print("stand-in %-12s %d requests" % (path, count))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--url", help="Endpoint to post to, default in process")
+    parser.add_argument("--rate", type=float, default=100, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--sizes",
+        default="1024",
+        help="Comma separated message sizes in bytes to pick from",
+    )
+    parser.add_argument(
+        "--signature-versions",
+        default="1,2",
+        help="Comma separated SignatureVersions to pick from",
+    )
+    parser.add_argument("--duplicates", type=float, default=0.0, help="Ratio")
+    parser.add_argument("--confirmations", type=float, default=0.0, help="Ratio")
+    parser.add_argument("--unsubscribes", type=float, default=0.0, help="Ratio")
+    parser.add_argument(
+        "--handler-ms",
+        type=float,
+        default=0.0,
+        help="How long the in process handler takes",
+    )
+    parser.add_argument("--timeout", type=float, default=15, help="Request timeout")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args(argv)
+
+    key, pem = make_certificate()
+    server = StandInServer(pem)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    publisher = Publisher(
+        key,
+        server.base_url,
+        sizes=[int(size) for size in args.sizes.split(",")],
+        signature_versions=args.signature_versions.split(","),
+        duplicate_ratio=args.duplicates,
+        confirmation_ratio=args.confirmations,
+        unsubscribe_ratio=args.unsubscribes,
+    )
+    try:
+        if args.url:
+            send = http_sender(args.url, args.timeout)
+            result = run(send, publisher, args.rate, args.duration, args.concurrency)
+        else:
+            with override_settings(
+                SNS_CERT_DOMAIN_REGEX=r"^localhost$",
+                SNS_SUBSCRIBE_DOMAIN_REGEX=r"^localhost$",
+            ):
+                send = in_process_sender(args.handler_ms / 1e3)
+                result = run(
+                    send, publisher, args.rate, args.duration, args.concurrency
+                )
+    finally:
+        server.shutdown()
+    result["stand_in_requests"] = server.counts
+
+    report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,265 @@
+"""
+Benchmark each stage of the SNSEndpoint request pipeline.
+
+Run from the repository root:
+
+    python -m benchmarks.pipeline
+    python -m benchmarks.pipeline --json results.json
+    python -m benchmarks.pipeline --compare results.json
+
+Stages are timed one call at a time and reported as the peak memory
+allocated by one call, mean, p50 and p99 latency and single-threaded
+throughput. Payload sizes go up to the 256 KB
+SNS maximum.
+"""
+
+from collections.abc import Callable
+from typing import Any
+import argparse
+import hashlib
+import json
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_sns_view.tests.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from cryptography import x509  # noqa: E402
+from django.test import RequestFactory, override_settings  # noqa: E402
+
+from django_sns_view.certs import LocMemCertStore, get_cert_store  # noqa: E402
+from django_sns_view.decoders import LeanDecoder  # noqa: E402
+from django_sns_view.tests.helpers import (  # noqa: E402
+    DIRNAME,
+    make_certificate,
+    sign_payload,
+)
+from django_sns_view.tests.test_data.notifications import SNS_NOTIFICATION  # noqa: E402
+from django_sns_view.types import Notification, SNSPayload  # noqa: E402
+from django_sns_view.utils import (  # noqa: E402
+    NOTIFICATION_HASH_FORMAT,
+    _verify_with_cert,
+    iter_signing_string,
+    verified_signatures,
+    verify_notification,
+)
+from django_sns_view.views import SNSEndpoint  # noqa: E402
+
+# The SNS maximum is 256 KB for the whole message, leave room for the envelope
+PAYLOAD_SIZES = {
+    "1KB": 1024,
+    "64KB": 64 * 1024,
+    "256KB": 256 * 1024 - 2048,
+}
+CERT_URL = "https://sns.us-east-1.amazonaws.com/SimpleNotificationService-bench.pem"
+
+
+class BenchEndpoint(SNSEndpoint):
+    def handle_message(self, message: str, notification: Notification) -> None:
+        pass
+
+
+def measure(fn: Callable[[], Any], iterations: int) -> dict[str, float]:
+    for _ in range(min(iterations, 10)):
+        fn()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    mean = statistics.fmean(timings)
+
+    # Tracing slows everything down, so measure allocations separately
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_kb": (peak - baseline) / 1024,
+        "mean_us": mean * 1e6,
+        "p50_us": timings[len(timings) // 2] * 1e6,
+        "p99_us": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e6,
+        "ops_per_sec": 1 / mean if mean else 0.0,
+    }
+
+
+def signing_digest(payload: Notification) -> bytes:
+    hasher = hashlib.sha1()
+    for chunk in iter_signing_string(payload):
+        hasher.update(chunk)
+    return hasher.digest()
+
+
+def legacy_signing_digest(payload: Notification) -> bytes:
+    # How the signed string was built before iter_signing_string
+    message = NOTIFICATION_HASH_FORMAT.format(**payload.model_dump())
+    return hashlib.sha1(message.encode("utf-8")).digest()
+
+
+def build_payloads(key: Any) -> dict[str, dict[str, bytes]]:
+    """
+    Signed notification bodies for each size and signature version.
+    """
+    payloads: dict[str, dict[str, bytes]] = {}
+    for label, size in PAYLOAD_SIZES.items():
+        for version in ("1", "2"):
+            payload = dict(
+                SNS_NOTIFICATION,
+                Message="x" * size,
+                SigningCertURL=CERT_URL,
+            )
+            payload = sign_payload(payload, key, signature_version=version)
+            payloads.setdefault(label, {})[version] = json.dumps(payload).encode()
+    return payloads
+
+
+def run(iterations: int) -> dict[str, dict[str, float]]:
+    key, pem = make_certificate()
+    with open(os.path.join(DIRNAME, "test_data", "example.pem"), "rb") as f:
+        fixture_pem = f.read()
+    fixture_cert = x509.load_pem_x509_certificate(fixture_pem)
+
+    # Serve the signing certificate from the store without touching the network
+    store = get_cert_store()
+    store.clear()
+    store.get_certificate(CERT_URL, lambda url: pem)
+
+    results: dict[str, dict[str, float]] = {}
+    pattern = SNSEndpoint().get_cert_domain_pattern()
+    factory = RequestFactory()
+    endpoint = BenchEndpoint.as_view()
+    lean = LeanDecoder()
+    lean_endpoint = BenchEndpoint.as_view(decoder=lean)
+
+    # The fixture is signed by an expired certificate that a store won't keep,
+    # so verify against it directly
+    fixture = Notification.model_validate(SNS_NOTIFICATION)
+    with override_settings(SNS_VERIFIED_SIGNATURE_CACHE_SIZE=0):
+        verified_signatures.clear()
+        results["verify/fixture/v1"] = measure(
+            lambda: _verify_with_cert(fixture, fixture_cert), iterations
+        )
+
+    results["cert/hit"] = measure(
+        lambda: store.get_certificate(CERT_URL, bytes), iterations
+    )
+    results["cert/miss"] = measure(
+        lambda: LocMemCertStore().get_certificate(CERT_URL, lambda url: pem),
+        iterations,
+    )
+
+    for label, by_version in build_payloads(key).items():
+        body = by_version["1"]
+        payload = SNSPayload.model_validate_json(body).root
+        host = payload.SigningCertURL.host or ""
+        results["parse/%s" % label] = measure(
+            lambda body=body: SNSPayload.model_validate_json(body), iterations
+        )
+        results["parse/lean/%s" % label] = measure(
+            lambda body=body: lean.decode(body), iterations
+        )
+        results["domain/%s" % label] = measure(
+            lambda host=host: re.search(pattern, host), iterations
+        )
+        results["signing_digest/%s" % label] = measure(
+            lambda payload=payload: signing_digest(payload), iterations
+        )
+        results["signing_digest/format/%s" % label] = measure(
+            lambda payload=payload: legacy_signing_digest(payload), iterations
+        )
+        for version, body in by_version.items():
+            payload = SNSPayload.model_validate_json(body).root
+            assert verify_notification(payload)
+            with override_settings(SNS_VERIFIED_SIGNATURE_CACHE_SIZE=0):
+                verified_signatures.clear()
+                results["verify/v%s/%s" % (version, label)] = measure(
+                    lambda payload=payload: verify_notification(payload), iterations
+                )
+            verify_notification(payload)
+            results["verify/v%s/%s/cached" % (version, label)] = measure(
+                lambda payload=payload: verify_notification(payload), iterations
+            )
+        assert isinstance(payload, Notification)
+        view = BenchEndpoint()
+        results["handler/%s" % label] = measure(
+            lambda view=view, payload=payload: view.run_handler(
+                payload.Message, payload
+            ),
+            iterations,
+        )
+
+        def post(body: bytes = body, endpoint: Callable[..., Any] = endpoint) -> None:
+            request = factory.post("/", body, content_type="text/plain")
+            response = endpoint(request)
+            assert response.status_code == 200, response.content
+
+        results["post/%s" % label] = measure(post, iterations)
+        results["post/lean/%s" % label] = measure(
+            lambda post=post: post(endpoint=lean_endpoint), iterations
+        )
+    return results
+
+
+def report(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]] | None = None,
+) -> None:
+    header = "%-30s %10s %12s %12s %12s %12s" % (
+        "stage",
+        "peak KB",
+        "mean us",
+        "p50 us",
+        "p99 us",
+        "ops/s",
+    )
+    if baseline is not None:
+        header += " %10s" % "vs base"
+    print(header)
+    for stage, result in results.items():
+        line = "%-30s %10.1f %12.1f %12.1f %12.1f %12.0f" % (
+            stage,
+            result.get("peak_kb", 0.0),
+            result["mean_us"],
+            result["p50_us"],
+            result["p99_us"],
+            result["ops_per_sec"],
+        )
+        if baseline is not None and stage in baseline:
+            line += " %+9.1f%%" % (
+                (result["mean_us"] / baseline[stage]["mean_us"] - 1) * 100
+            )
+        print(line)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--compare", help="Compare against results from --json")
+    args = parser.parse_args(argv)
+
+    results = run(args.iterations)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,83 @@
+from collections.abc import Mapping
+import threading
+
+
+class AdmissionController:
+    """
+    Limit how many notifications are handled at once, overall and per
+    topic, so a slow downstream system makes SNS back off instead of
+    tying up every worker.
+
+    A notification over the limits waits for up to queue_timeout seconds
+    if fewer than max_queued are already waiting, otherwise acquire returns
+    False straight away.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int | None = None,
+        max_concurrent_per_topic: int | None = None,
+        topic_limits: Mapping[str, int] | None = None,
+        max_queued: int = 0,
+        queue_timeout: float = 1.0,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_concurrent_per_topic = max_concurrent_per_topic
+        self.topic_limits = dict(topic_limits or {})
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._active_by_topic: dict[str, int] = {}
+        self._queued = 0
+        self._condition = threading.Condition()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def get_topic_limit(self, topic_arn: str) -> int | None:
+        return self.topic_limits.get(topic_arn, self.max_concurrent_per_topic)
+
+    def acquire(self, topic_arn: str, block: bool = True) -> bool:
+        """
+        Take a slot for a notification from topic_arn, returning False if
+        it should be rejected. Without block it is never queued.
+        """
+        with self._condition:
+            if not self._can_admit(topic_arn):
+                if not block or self._queued >= self.max_queued:
+                    return False
+                self._queued += 1
+                try:
+                    admitted = self._condition.wait_for(
+                        lambda: self._can_admit(topic_arn), self.queue_timeout
+                    )
+                finally:
+                    self._queued -= 1
+                if not admitted:
+                    return False
+            self._active += 1
+            self._active_by_topic[topic_arn] = (
+                self._active_by_topic.get(topic_arn, 0) + 1
+            )
+            return True
+
+    def release(self, topic_arn: str) -> None:
+        with self._condition:
+            self._active -= 1
+            remaining = self._active_by_topic[topic_arn] - 1
+            if remaining:
+                self._active_by_topic[topic_arn] = remaining
+            else:
+                del self._active_by_topic[topic_arn]
+            self._condition.notify_all()
+
+    def _can_admit(self, topic_arn: str) -> bool:
+        if self.max_concurrent is not None and self._active >= self.max_concurrent:
+            return False
+        limit = self.get_topic_limit(topic_arn)
+        return limit is None or self._active_by_topic.get(topic_arn, 0) < limit
@@ -0,0 +1,21 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class SNSViewConfig(AppConfig):
+    name = "django_sns_view"
+    verbose_name = "SNS View"
+
+    def ready(self) -> None:
+        # Verification dependencies are imported on first use unless asked
+        # to load them up front
+        if getattr(settings, "SNS_WARMUP", False):
+            from .utils import warmup
+
+            warmup()
+        # Warm the certificate store from the bundle so the first requests
+        # don't pay for fetching certificates
+        if getattr(settings, "SNS_CERT_BUNDLE", None):
+            from .bundle import load_cert_bundle
+
+            load_cert_bundle()
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from logging.handlers import QueueHandler, QueueListener
+from typing import TYPE_CHECKING, Any
+import atexit
+import logging
+import queue
+import random
+
+if TYPE_CHECKING:
+    from .types import Notification
+
+
+class LazyBody:
+    """
+    A request body that is only decoded and truncated when a log handler
+    turns it into a string.
+    """
+
+    def __init__(self, body: bytes, max_length: int | None) -> None:
+        self.body = body
+        self.max_length = max_length
+
+    def __str__(self) -> str:
+        return _truncate(self.body.decode("utf-8", "replace"), self.max_length)
+
+    def __repr__(self) -> str:
+        return repr(str(self))
+
+
+class LazyPayload:
+    """
+    A payload that is only serialized when a log handler turns it into a
+    string.
+    """
+
+    def __init__(self, payload: Notification, max_length: int | None) -> None:
+        self.payload = payload
+        self.max_length = max_length
+
+    def __str__(self) -> str:
+        return _truncate(self.payload.model_dump_json(), self.max_length)
+
+    def __repr__(self) -> str:
+        return repr(str(self))
+
+
+def _truncate(text: str, max_length: int | None) -> str:
+    if max_length is None or len(text) <= max_length:
+        return text
+    return "%s...[%d more characters]" % (text[:max_length], len(text) - max_length)
+
+
+class AuditLogger:
+    """
+    Log received notifications. Only sample_rate of them are logged, and
+    the body and payload are passed to handlers as LazyBody and
+    LazyPayload, so nothing is serialized unless a handler emits the record,
+    and then only up to max_length characters.
+    """
+
+    def __init__(
+        self,
+        logger_name: str = "django_sns_view.views",
+        level: int = logging.INFO,
+        sample_rate: float = 1.0,
+        max_length: int | None = 4096,
+    ) -> None:
+        self.logger = logging.getLogger(logger_name)
+        self.level = level
+        self.sample_rate = sample_rate
+        self.max_length = max_length
+
+    def sampled(self) -> bool:
+        if not self.logger.isEnabledFor(self.level):
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def log_notification(self, body: bytes, payload: Notification) -> None:
+        if not self.sampled():
+            return
+        self.logger.log(
+            self.level,
+            "SNS Notification received",
+            extra=dict(
+                message_type=payload.Type,
+                message_id=str(payload.MessageId),
+                topic_arn=payload.TopicArn,
+                sns_payload=LazyBody(body, self.max_length),
+                payload_message=LazyPayload(payload, self.max_length),
+            ),
+        )
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    A QueueHandler that drops records instead of failing when its queue is
+    full, counting them in dropped.
+    """
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def start_queue_logging(
+    *handlers: logging.Handler,
+    logger_name: str = "django_sns_view",
+    maxsize: int = 10000,
+) -> QueueListener:
+    """
+    Move the handlers of logger_name, or the given handlers, to a thread so
+    records are formatted and written off the request thread. At most
+    maxsize records are queued, further records are dropped. Returns the
+    listener, which is stopped when the process exits.
+    """
+    logger = logging.getLogger(logger_name)
+    if not handlers:
+        handlers = tuple(logger.handlers)
+    for handler in handlers:
+        logger.removeHandler(handler)
+    records: queue.Queue[Any] = queue.Queue(maxsize)
+    logger.addHandler(DroppingQueueHandler(records))
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(_stop_listener, listener)
+    return listener
+
+
+def _stop_listener(listener: QueueListener) -> None:
+    # QueueListener.stop fails if it was already stopped
+    if listener._thread is not None:
+        listener.stop()
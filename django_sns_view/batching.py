@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Collection
+from concurrent.futures import Future
+from typing import TYPE_CHECKING
+import threading
+
+if TYPE_CHECKING:
+    from .types import Notification
+
+
+class BatchItemFailed(Exception):
+    """
+    Raised by MessageBatcher.submit when the flush reported the notification
+    failed.
+    """
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.items: list[Notification] = []
+        self.futures: list[Future[None]] = []
+        self.full = threading.Event()
+
+
+class MessageBatcher:
+    """
+    Collect notifications submitted from concurrent requests into batches,
+    which are flushed once they hold max_size notifications or max_wait
+    seconds after the first was added.
+
+    The thread that starts a batch flushes it, the others wait for it, so
+    every caller returns only once its own item was handled. Batches only
+    form when requests are handled concurrently, e.g. by threaded workers.
+    """
+
+    def __init__(self, max_size: int = 100, max_wait: float = 0.05) -> None:
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._batches: dict[object, _Batch] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        key: object,
+        flush: Callable[[list[Notification]], Collection[Notification] | None],
+        item: Notification,
+    ) -> None:
+        """
+        Add item to the open batch for key and wait for it to be flushed.
+
+        flush is called with the batch and returns the notifications that
+        failed, if any, for which BatchItemFailed is raised. If flush raises,
+        the error is raised for every notification in the batch.
+        """
+        future: Future[None] = Future()
+        with self._lock:
+            batch = self._batches.get(key)
+            leader = batch is None
+            if batch is None:
+                batch = self._batches[key] = _Batch()
+            batch.items.append(item)
+            batch.futures.append(future)
+            if len(batch.items) >= self.max_size:
+                # Close the batch so the next item starts a new one
+                del self._batches[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.max_wait)
+            with self._lock:
+                if self._batches.get(key) is batch:
+                    del self._batches[key]
+            self._flush(batch, flush)
+        future.result()
+
+    def _flush(
+        self,
+        batch: _Batch,
+        flush: Callable[[list[Notification]], Collection[Notification] | None],
+    ) -> None:
+        try:
+            failed = flush(batch.items)
+        except BaseException as e:
+            for future in batch.futures:
+                future.set_exception(e)
+            return
+        for item, future in zip(batch.items, batch.futures):
+            if failed is not None and item in failed:
+                future.set_exception(BatchItemFailed())
+            else:
+                future.set_result(None)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+if TYPE_CHECKING:
+    from .certs import BaseCertStore
+
+logger = logging.getLogger(__name__)
+
+URL_HEADER = "SigningCertURL: "
+
+
+class UnknownCertificateError(ValueError):
+    """
+    Raised for a signing certificate that isn't in the bundle when
+    SNS_CERT_NETWORK_FALLBACK is False.
+    """
+
+
+def read_cert_bundle(path: str) -> dict[str, bytes]:
+    """
+    Read a bundle written by write_cert_bundle into a mapping of signing
+    certificate URL to PEM.
+    """
+    certs: dict[str, bytes] = {}
+    url = None
+    lines: list[str] = []
+    with open(path) as f:
+        for line in f:
+            if line.startswith(URL_HEADER):
+                if url is not None:
+                    certs[url] = "".join(lines).encode("ascii")
+                url = line[len(URL_HEADER) :].strip()
+                lines = []
+            elif url is not None:
+                lines.append(line)
+    if url is not None:
+        certs[url] = "".join(lines).encode("ascii")
+    return certs
+
+
+def write_cert_bundle(path: str, certs: dict[str, bytes]) -> None:
+    """
+    Write certificates to a single PEM file, each preceded by the URL it was
+    fetched from. Text outside of the BEGIN/END lines is ignored by PEM
+    parsers, so the bundle is also a valid PEM file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, "w") as f:
+        for url, pem in sorted(certs.items()):
+            f.write("%s%s\n" % (URL_HEADER, url))
+            f.write(pem.decode("ascii").strip() + "\n")
+    os.replace(tmp_path, path)
+
+
+_cert_bundle: dict[str, bytes] | None = None
+
+
+def get_cert_bundle() -> dict[str, bytes]:
+    """
+    Return the certificates in the bundle at the SNS_CERT_BUNDLE path.
+    """
+    global _cert_bundle
+    if _cert_bundle is None:
+        path = getattr(settings, "SNS_CERT_BUNDLE", None)
+        _cert_bundle = {}
+        if path:
+            try:
+                _cert_bundle = read_cert_bundle(path)
+            except FileNotFoundError:
+                logger.warning("SNS certificate bundle %s doesn't exist", path)
+    return _cert_bundle
+
+
+def load_cert_bundle(store: BaseCertStore | None = None) -> int:
+    """
+    Load the bundled certificates into the certificate store, e.g. when a
+    worker starts, returning how many were loaded.
+    """
+    if store is None:
+        from .certs import get_cert_store
+
+        store = get_cert_store()
+    bundle = get_cert_bundle()
+    for url, pem in bundle.items():
+        store.get_certificate(url, lambda url: pem)
+    return len(bundle)
+
+
+@receiver(setting_changed)
+def _reset_cert_bundle(*, setting: str, **kwargs: Any) -> None:
+    global _cert_bundle
+    if setting == "SNS_CERT_BUNDLE":
+        _cert_bundle = None
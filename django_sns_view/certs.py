@@ -0,0 +1,342 @@
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from typing import Any
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from cryptography import x509
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CERT_STORE = {
+    "BACKEND": "django_sns_view.certs.LocMemCertStore",
+}
+
+
+class BaseCertStore:
+    """
+    Stores signing certificates (as PEM bytes) keyed by their URL.
+
+    Subclasses implement get/set/delete against the backing storage. Parsed
+    certificates are additionally kept in process so a hit doesn't pay for
+    parsing the PEM, up to max_size of them, evicting the least recently
+    used first. Concurrent misses for the same URL are coalesced into a
+    single fetch.
+    """
+
+    def __init__(
+        self,
+        max_ttl: float = 86400,
+        lock_timeout: float = 10,
+        poll_interval: float = 0.05,
+        max_size: int = 128,
+    ) -> None:
+        self.max_ttl = max_ttl
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.max_size = max_size
+        self._local: OrderedDict[str, tuple[x509.Certificate, float]] = OrderedDict()
+        self._local_lock = threading.Lock()
+        # Per URL locks and how many threads are using them, so they can be
+        # dropped once nobody is
+        self._locks: dict[str, tuple[threading.Lock, int]] = {}
+        self._locks_lock = threading.Lock()
+        self._inflight: dict[str, asyncio.Future[bytes]] = {}
+
+    def get(self, cert_url: str) -> bytes | None:
+        raise NotImplementedError
+
+    def set(self, cert_url: str, pem: bytes, timeout: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, cert_url: str) -> None:
+        raise NotImplementedError
+
+    def acquire_fetch_lock(self, cert_url: str) -> bool:
+        """
+        Try to become the one process fetching cert_url. Stores shared
+        between processes override this, local stores always succeed.
+        """
+        return True
+
+    def release_fetch_lock(self, cert_url: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        with self._local_lock:
+            self._local.clear()
+
+    def get_certificate(
+        self, cert_url: str, fetch: Callable[[str], bytes]
+    ) -> x509.Certificate:
+        cert = self._get_local(cert_url)
+        if cert is not None:
+            return cert
+        with self._lock_for(cert_url):
+            # Another thread may have filled the cache while we waited
+            cert = self._get_local(cert_url)
+            if cert is not None:
+                return cert
+            pem = self.get(cert_url)
+            if pem is None:
+                return self._fetch_single_flight(cert_url, fetch)
+            return self._remember(cert_url, pem)
+
+    async def aget_certificate(
+        self, cert_url: str, fetch: Callable[[str], Awaitable[bytes]]
+    ) -> x509.Certificate:
+        cert = self._get_local(cert_url)
+        if cert is not None:
+            return cert
+        inflight = self._inflight.get(cert_url)
+        if inflight is not None:
+            return self._remember(cert_url, await asyncio.shield(inflight))
+
+        future: asyncio.Future[bytes] = asyncio.get_running_loop().create_future()
+        self._inflight[cert_url] = future
+        try:
+            pem = await sync_to_async(self.get, thread_sensitive=False)(cert_url)
+            fetched = pem is None
+            if pem is None:
+                pem = await fetch(cert_url)
+            cert = self._remember(cert_url, pem)
+            if fetched:
+                await sync_to_async(self.set, thread_sensitive=False)(
+                    cert_url, pem, self.get_ttl(cert)
+                )
+            future.set_result(pem)
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._inflight[cert_url]
+        return cert
+
+    def get_ttl(self, cert: x509.Certificate) -> float:
+        """
+        Cache a certificate until it expires, but never longer than max_ttl
+        so rotated certificates are eventually picked up.
+        """
+        remaining = (cert.not_valid_after_utc - datetime.now(UTC)).total_seconds()
+        return max(0.0, min(remaining, self.max_ttl))
+
+    def _get_local(self, cert_url: str) -> x509.Certificate | None:
+        with self._local_lock:
+            entry = self._local.get(cert_url)
+            if entry is None:
+                return None
+            cert, expires = entry
+            if expires <= time.monotonic():
+                del self._local[cert_url]
+                return None
+            self._local.move_to_end(cert_url)
+            return cert
+
+    def _remember(self, cert_url: str, pem: bytes) -> x509.Certificate:
+        cert = x509.load_pem_x509_certificate(pem)
+        expires = time.monotonic() + self.get_ttl(cert)
+        with self._local_lock:
+            self._local[cert_url] = (cert, expires)
+            self._local.move_to_end(cert_url)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+        return cert
+
+    @contextmanager
+    def _lock_for(self, cert_url: str) -> Iterator[None]:
+        with self._locks_lock:
+            lock, users = self._locks.get(cert_url, (threading.Lock(), 0))
+            self._locks[cert_url] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._locks_lock:
+                lock, users = self._locks[cert_url]
+                if users == 1:
+                    del self._locks[cert_url]
+                else:
+                    self._locks[cert_url] = (lock, users - 1)
+
+    def _fetch_single_flight(
+        self, cert_url: str, fetch: Callable[[str], bytes]
+    ) -> x509.Certificate:
+        deadline = time.monotonic() + self.lock_timeout
+        while not self.acquire_fetch_lock(cert_url):
+            # Someone else is fetching, wait for them to publish it
+            time.sleep(self.poll_interval)
+            pem = self.get(cert_url)
+            if pem is not None:
+                return self._remember(cert_url, pem)
+            if time.monotonic() >= deadline:
+                logger.warning("Timed out waiting on fetch of %s", cert_url)
+                return self._remember(cert_url, fetch(cert_url))
+        try:
+            pem = fetch(cert_url)
+            cert = self._remember(cert_url, pem)
+            self.set(cert_url, pem, self.get_ttl(cert))
+        finally:
+            self.release_fetch_lock(cert_url)
+        return cert
+
+
+class LocMemCertStore(BaseCertStore):
+    """
+    Keep certificates in process memory only.
+    """
+
+    def get(self, cert_url: str) -> bytes | None:
+        return None
+
+    def set(self, cert_url: str, pem: bytes, timeout: float) -> None:
+        pass
+
+    def delete(self, cert_url: str) -> None:
+        self._local.pop(cert_url, None)
+
+
+class DjangoCacheCertStore(BaseCertStore):
+    """
+    Share certificates between processes and hosts using one of the caches
+    configured in the CACHES setting.
+    """
+
+    def __init__(
+        self,
+        cache_alias: str = "default",
+        key_prefix: str = "sns-cert",
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self) -> Any:
+        return caches[self.cache_alias]
+
+    def make_key(self, cert_url: str, suffix: str = "") -> str:
+        digest = hashlib.sha256(cert_url.encode("utf-8")).hexdigest()
+        return "%s:%s%s" % (self.key_prefix, digest, suffix)
+
+    def get(self, cert_url: str) -> bytes | None:
+        pem: bytes | None = self.cache.get(self.make_key(cert_url))
+        return pem
+
+    def set(self, cert_url: str, pem: bytes, timeout: float) -> None:
+        if timeout > 0:
+            self.cache.set(self.make_key(cert_url), pem, timeout)
+
+    def delete(self, cert_url: str) -> None:
+        self._local.pop(cert_url, None)
+        self.cache.delete(self.make_key(cert_url))
+
+    def acquire_fetch_lock(self, cert_url: str) -> bool:
+        acquired: bool = self.cache.add(
+            self.make_key(cert_url, ":lock"), 1, self.lock_timeout
+        )
+        return acquired
+
+    def release_fetch_lock(self, cert_url: str) -> None:
+        self.cache.delete(self.make_key(cert_url, ":lock"))
+
+
+class FileCertStore(BaseCertStore):
+    """
+    Share certificates between the processes on a host through a directory.
+    The expiry of each certificate is stored as its file's mtime.
+    """
+
+    def __init__(self, directory: str, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.directory = directory
+
+    def path(self, cert_url: str, suffix: str = ".pem") -> str:
+        digest = hashlib.sha256(cert_url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + suffix)
+
+    def get(self, cert_url: str) -> bytes | None:
+        path = self.path(cert_url)
+        try:
+            if os.stat(path).st_mtime <= time.time():
+                return None
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, cert_url: str, pem: bytes, timeout: float) -> None:
+        if timeout <= 0:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(pem)
+        expires = time.time() + timeout
+        os.utime(tmp_path, (expires, expires))
+        os.replace(tmp_path, self.path(cert_url))
+
+    def delete(self, cert_url: str) -> None:
+        self._local.pop(cert_url, None)
+        try:
+            os.remove(self.path(cert_url))
+        except FileNotFoundError:
+            pass
+
+    def acquire_fetch_lock(self, cert_url: str) -> bool:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(cert_url, ".lock")
+        try:
+            # Locks left behind by a crashed process go stale
+            if os.stat(path).st_mtime + self.lock_timeout < time.time():
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        return True
+
+    def release_fetch_lock(self, cert_url: str) -> None:
+        try:
+            os.remove(self.path(cert_url, ".lock"))
+        except FileNotFoundError:
+            pass
+
+
+_cert_store: BaseCertStore | None = None
+
+
+def get_cert_store() -> BaseCertStore:
+    """
+    Return the certificate store configured by the SNS_CERT_STORE setting.
+    """
+    global _cert_store
+    if _cert_store is None:
+        config = getattr(settings, "SNS_CERT_STORE", DEFAULT_CERT_STORE)
+        backend = import_string(config["BACKEND"])
+        _cert_store = backend(**config.get("OPTIONS", {}))
+    return _cert_store
+
+
+@receiver(setting_changed)
+def _reset_cert_store(*, setting: str, **kwargs: Any) -> None:
+    global _cert_store
+    if setting == "SNS_CERT_STORE":
+        _cert_store = None
@@ -0,0 +1,169 @@
+from typing import Any
+from urllib.parse import urlsplit
+import logging
+import os
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, HTTPError, RequestException
+from urllib3.util.retry import Retry
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(ConnectionError):
+    """
+    Raised instead of making a request to a host or URL that recently failed.
+    """
+
+
+class HTTPClient:
+    """
+    Makes the outbound requests to SNS: fetching signing certificates and
+    confirming subscriptions.
+
+    Connections are pooled and kept alive, every request has connect and
+    read timeouts and is retried with backoff on connection errors and 5xx
+    responses. After failure_threshold consecutive failures a host's circuit
+    opens and requests to it fail fast for reset_timeout seconds, and a URL
+    that failed fails fast for negative_ttl seconds.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10,
+        retries: int = 2,
+        backoff_factor: float = 0.2,
+        pool_maxsize: int = 10,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        negative_ttl: float = 5,
+    ) -> None:
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_maxsize = pool_maxsize
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.negative_ttl = negative_ttl
+        self._session: requests.Session | None = None
+        self._pid: int | None = None
+        self._failures: dict[str, int] = {}
+        self._open_until: dict[str, float] = {}
+        self._failed_urls: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        # Pooled connections can't be shared with a forked child
+        if self._session is None or self._pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_maxsize=self.pool_maxsize,
+                max_retries=Retry(
+                    total=self.retries,
+                    backoff_factor=self.backoff_factor,
+                    status_forcelist=(500, 502, 503, 504),
+                    allowed_methods=("GET",),
+                    raise_on_status=False,
+                ),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+            self._pid = os.getpid()
+        return self._session
+
+    def get(self, url: str) -> requests.Response:
+        """
+        GET url, raising HTTPError on an error status.
+        """
+        self.check_circuit(url)
+        try:
+            response = self.session.get(
+                url, timeout=(self.connect_timeout, self.read_timeout)
+            )
+            response.raise_for_status()
+        except RequestException as e:
+            self.record_failure(url, e)
+            raise
+        self.record_success(url)
+        return response
+
+    async def aget(self, url: str) -> bytes:
+        """
+        GET url without blocking the event loop, returning the body and
+        raising HTTPError on an error status. The request is made by get in
+        a worker thread, so it shares its connection pool and retries.
+        """
+        response = await sync_to_async(self.get, thread_sensitive=False)(url)
+        return response.content
+
+    def check_circuit(self, url: str) -> None:
+        now = time.monotonic()
+        host = urlsplit(url).netloc
+        with self._lock:
+            if self._failed_urls.get(url, 0) > now:
+                raise CircuitOpenError("Recent request to %s failed" % url)
+            if self._open_until.get(host, 0) > now:
+                raise CircuitOpenError("Circuit open for %s" % host)
+
+    def record_failure(self, url: str, error: BaseException) -> None:
+        now = time.monotonic()
+        host = urlsplit(url).netloc
+        with self._lock:
+            self._failed_urls[url] = now + self.negative_ttl
+            # An error status only says something about the URL, the host is
+            # healthy if it's answering with a 4xx
+            if not _is_retryable(error):
+                return
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.failure_threshold:
+                logger.warning(
+                    "Opening circuit for %s after %s failures", host, failures
+                )
+                self._open_until[host] = now + self.reset_timeout
+
+    def record_success(self, url: str) -> None:
+        host = urlsplit(url).netloc
+        with self._lock:
+            self._failed_urls.pop(url, None)
+            self._failures.pop(host, None)
+            self._open_until.pop(host, None)
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, HTTPError):
+        response = error.response
+        return response is None or response.status_code >= 500
+    return True
+
+
+_http_client: HTTPClient | None = None
+
+
+def get_http_client() -> HTTPClient:
+    """
+    Return the client configured by the SNS_HTTP_CLIENT setting.
+    """
+    global _http_client
+    if _http_client is None:
+        options = getattr(settings, "SNS_HTTP_CLIENT", {})
+        _http_client = HTTPClient(**options)
+    return _http_client
+
+
+@receiver(setting_changed)
+def _reset_http_client(*, setting: str, **kwargs: Any) -> None:
+    global _http_client
+    if setting == "SNS_HTTP_CLIENT":
+        _http_client = None
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+import hashlib
+import logging
+import time
+
+from django.core.cache import caches
+
+from .executors import BackgroundExecutor
+
+if TYPE_CHECKING:
+    from .types import SubscriptionConfirmation
+
+logger = logging.getLogger(__name__)
+
+
+class ConfirmationManager:
+    """
+    Confirm subscriptions in the background so the SubscriptionConfirmation
+    can be acknowledged straight away.
+
+    SNS often sends the same confirmation to several workers at once, so
+    each (TopicArn, Token) is claimed with cache.add on one of the caches
+    configured in the CACHES setting and only confirmed by the worker that
+    claimed it. The request is retried by the HTTP client configured by
+    SNS_HTTP_CLIENT, and a confirmation that still fails is released so a
+    redelivery tries again. Confirmed subscriptions are recorded by
+    record_confirmation.
+    """
+
+    def __init__(
+        self,
+        cache_alias: str = "default",
+        key_prefix: str = "sns-confirmation",
+        executor: BackgroundExecutor | None = None,
+        # SubscribeURL tokens expire after three days
+        ttl: float = 3 * 24 * 3600,
+    ) -> None:
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+        self.executor = executor or BackgroundExecutor(max_workers=2, max_pending=50)
+        self.ttl = ttl
+
+    @property
+    def cache(self) -> Any:
+        return caches[self.cache_alias]
+
+    def make_key(self, payload: SubscriptionConfirmation) -> str:
+        digest = hashlib.sha256(
+            ("%s\n%s" % (payload.TopicArn, payload.Token)).encode("utf-8")
+        ).hexdigest()
+        return "%s:%s" % (self.key_prefix, digest)
+
+    def make_confirmed_key(self, topic_arn: str) -> str:
+        digest = hashlib.sha256(topic_arn.encode("utf-8")).hexdigest()
+        return "%s:confirmed:%s" % (self.key_prefix, digest)
+
+    def submit(self, payload: SubscriptionConfirmation) -> bool:
+        """
+        Queue the confirmation unless another worker already claimed it,
+        returning False if it couldn't be queued.
+        """
+        key = self.make_key(payload)
+        if not self.cache.add(key, "pending", self.ttl):
+            logger.info("Subscription to %s already being confirmed", payload.TopicArn)
+            return True
+        return self._submit(key, payload)
+
+    async def asubmit(self, payload: SubscriptionConfirmation) -> bool:
+        key = self.make_key(payload)
+        if not await self.cache.aadd(key, "pending", self.ttl):
+            logger.info("Subscription to %s already being confirmed", payload.TopicArn)
+            return True
+        return self._submit(key, payload)
+
+    def _submit(self, key: str, payload: SubscriptionConfirmation) -> bool:
+        submitted = self.executor.submit(
+            self.confirm,
+            key,
+            payload,
+            on_error=lambda error: self.handle_error(error, key, payload),
+        )
+        if not submitted:
+            self.cache.delete(key)
+        return submitted
+
+    def confirm(self, key: str, payload: SubscriptionConfirmation) -> None:
+        """
+        GET the SubscribeURL. Connection errors and 5xx responses are
+        already retried with backoff by the HTTP client, retrying here too
+        would multiply the attempts and run into its negative cache.
+        """
+        from .client import get_http_client
+
+        get_http_client().get(str(payload.SubscribeURL))
+        self.cache.set(key, "confirmed", self.ttl)
+        self.record_confirmation(payload)
+
+    def handle_error(
+        self, error: BaseException, key: str, payload: SubscriptionConfirmation
+    ) -> None:
+        logger.error(
+            "Unable to confirm subscription to %s",
+            payload.TopicArn,
+            exc_info=error,
+        )
+        # Let a redelivery of the confirmation try again
+        self.cache.delete(key)
+
+    def record_confirmation(self, payload: SubscriptionConfirmation) -> None:
+        """
+        Record the confirmed subscription. Override to store it elsewhere,
+        e.g. in a model.
+        """
+        logger.info("Confirmed subscription to %s", payload.TopicArn)
+        self.cache.set(
+            self.make_confirmed_key(payload.TopicArn), time.time(), timeout=None
+        )
+
+    def is_confirmed(self, topic_arn: str) -> bool:
+        return self.cache.get(self.make_confirmed_key(topic_arn)) is not None
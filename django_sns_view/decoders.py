@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, cast
+import base64
+import binascii
+import json
+import uuid
+
+if TYPE_CHECKING:
+    from urllib3.util import Url
+
+    from .types import AnySNSPayload
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+class DecodeError(ValueError):
+    """
+    Raised when a request body isn't a valid SNS message.
+    """
+
+
+class BaseDecoder:
+    """
+    Turns the body of a request into an SNS payload, raising DecodeError if
+    it isn't a valid message.
+    """
+
+    def decode(self, body: bytes) -> AnySNSPayload:
+        raise NotImplementedError
+
+
+class PydanticDecoder(BaseDecoder):
+    """
+    Parse messages into the pydantic models in django_sns_view.types.
+    """
+
+    def decode(self, body: bytes) -> AnySNSPayload:
+        import pydantic_core
+
+        from .types import SNSPayload
+
+        try:
+            return SNSPayload.model_validate_json(body).root
+        except pydantic_core.ValidationError as e:
+            raise DecodeError(str(e)) from e
+
+
+class LazyURL:
+    """
+    A URL that is only split into its parts when they are accessed. It is
+    split by urllib3, the parser of the client that requests it, so its host
+    is the one that is connected to.
+    """
+
+    __slots__ = ("url", "_parts")
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self._parts: Url | None = None
+
+    @property
+    def parts(self) -> Url:
+        if self._parts is None:
+            from urllib3.util import parse_url
+
+            self._parts = parse_url(self.url)
+        return self._parts
+
+    @property
+    def scheme(self) -> str:
+        return self.parts.scheme or ""
+
+    @property
+    def host(self) -> str | None:
+        return self.parts.host
+
+    @property
+    def port(self) -> int | None:
+        return self.parts.port or DEFAULT_PORTS.get(self.scheme)
+
+    @property
+    def username(self) -> str | None:
+        auth = self.parts.auth
+        return None if auth is None else auth.partition(":")[0]
+
+    @property
+    def password(self) -> str | None:
+        auth = self.parts.auth
+        return None if auth is None or ":" not in auth else auth.partition(":")[2]
+
+    @property
+    def path(self) -> str:
+        return self.parts.path or ""
+
+    @property
+    def query(self) -> str:
+        return self.parts.query or ""
+
+    def __str__(self) -> str:
+        return self.url
+
+    def __repr__(self) -> str:
+        return "LazyURL(%r)" % self.url
+
+
+class LeanMessageAttribute:
+    __slots__ = ("Type", "Value")
+
+    def __init__(self, type: str, value: str) -> None:
+        self.Type = type
+        self.Value = value
+
+
+class LeanPayload:
+    """
+    An SNS message with the same attributes as the pydantic models, that
+    only checks the fields are present and are strings. URLs are split and
+    the Signature is base64 decoded when they are first accessed.
+    """
+
+    __slots__ = (
+        "_data",
+        "_signature",
+        "Type",
+        "MessageId",
+        "TopicArn",
+        "Message",
+        "Timestamp",
+        "SignatureVersion",
+        "SigningCertURL",
+    )
+
+    required_fields: tuple[str, ...] = (
+        "MessageId",
+        "TopicArn",
+        "Message",
+        "Timestamp",
+        "SignatureVersion",
+        "Signature",
+        "SigningCertURL",
+    )
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        for field in self.required_fields:
+            if not isinstance(data.get(field), str):
+                raise DecodeError("%s must be a string" % field)
+        try:
+            self.MessageId = uuid.UUID(data["MessageId"])
+        except ValueError:
+            raise DecodeError("MessageId must be a UUID") from None
+        self._data = data
+        self._signature: bytes | None = None
+        self.Type: str = data["Type"]
+        self.TopicArn: str = data["TopicArn"]
+        self.Message: str = data["Message"]
+        self.Timestamp: str = data["Timestamp"]
+        self.SignatureVersion: str = data["SignatureVersion"]
+        self.SigningCertURL = _url(data, "SigningCertURL")
+
+    @property
+    def Signature(self) -> bytes:
+        if self._signature is None:
+            try:
+                self._signature = base64.b64decode(self._data["Signature"])
+            except binascii.Error:
+                raise DecodeError("Signature must be base64 encoded") from None
+        return self._signature
+
+    def model_dump_json(self) -> str:
+        """
+        Serialize the fields the pydantic model has, so the result can be
+        parsed by it.
+        """
+        data = {field: self._data.get(field) for field in self.required_fields}
+        data["Type"] = self.Type
+        data.update(self._dump_extra_fields())
+        return json.dumps(data)
+
+    def _dump_extra_fields(self) -> dict[str, Any]:
+        return {}
+
+    def __repr__(self) -> str:
+        return "%s(MessageId=%r, TopicArn=%r)" % (
+            type(self).__name__,
+            str(self.MessageId),
+            self.TopicArn,
+        )
+
+
+class LeanSubscriptionConfirmation(LeanPayload):
+    __slots__ = ("Token", "SubscribeURL")
+
+    required_fields = LeanPayload.required_fields + ("Token", "SubscribeURL")
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        super().__init__(data)
+        self.Token: str = data["Token"]
+        self.SubscribeURL = _url(data, "SubscribeURL")
+
+
+class LeanUnsubscribeConfirmation(LeanSubscriptionConfirmation):
+    __slots__ = ()
+
+
+class LeanNotification(LeanPayload):
+    __slots__ = (
+        "Subject",
+        "UnsubscribeURL",
+        "MessageAttributes",
+        "MessageGroupId",
+        "SequenceNumber",
+        "MessageDeduplicationId",
+    )
+
+    required_fields = LeanPayload.required_fields + ("UnsubscribeURL",)
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        super().__init__(data)
+        self.Subject = _optional_str(data, "Subject")
+        self.UnsubscribeURL = _url(data, "UnsubscribeURL")
+        self.MessageGroupId = _optional_str(data, "MessageGroupId")
+        self.SequenceNumber = _optional_str(data, "SequenceNumber")
+        self.MessageDeduplicationId = _optional_str(data, "MessageDeduplicationId")
+        self.MessageAttributes: dict[str, LeanMessageAttribute] = {}
+        attributes = data.get("MessageAttributes") or {}
+        if not isinstance(attributes, dict):
+            raise DecodeError("MessageAttributes must be an object")
+        for name, attribute in attributes.items():
+            try:
+                type, value = attribute["Type"], attribute["Value"]
+            except (TypeError, KeyError):
+                raise DecodeError("Invalid message attribute %r" % name) from None
+            if not isinstance(type, str) or not isinstance(value, str):
+                raise DecodeError("Invalid message attribute %r" % name)
+            self.MessageAttributes[name] = LeanMessageAttribute(type, value)
+
+    def _dump_extra_fields(self) -> dict[str, Any]:
+        return {
+            "Subject": self.Subject,
+            "MessageAttributes": {
+                name: {"Type": attribute.Type, "Value": attribute.Value}
+                for name, attribute in self.MessageAttributes.items()
+            },
+            "MessageGroupId": self.MessageGroupId,
+            "SequenceNumber": self.SequenceNumber,
+            "MessageDeduplicationId": self.MessageDeduplicationId,
+        }
+
+
+def _optional_str(data: dict[str, Any], field: str) -> str | None:
+    value = data.get(field)
+    if value is not None and not isinstance(value, str):
+        raise DecodeError("%s must be a string" % field)
+    return value
+
+
+def _url(data: dict[str, Any], field: str) -> LazyURL:
+    url: str = data[field]
+    if not url.startswith(("https://", "http://")):
+        raise DecodeError("%s must be an http(s) URL" % field)
+    # Parsers disagree on where the host of such URLs ends
+    if "\\" in url or not url.isprintable() or " " in url:
+        raise DecodeError("%s must be a valid URL" % field)
+    return LazyURL(url)
+
+
+class LeanDecoder(BaseDecoder):
+    """
+    Parse messages into LeanPayload objects instead of pydantic models. They
+    have the same attributes, so they can be used wherever the models are.
+    """
+
+    payload_classes: dict[str, type[LeanPayload]] = {
+        "Notification": LeanNotification,
+        "SubscriptionConfirmation": LeanSubscriptionConfirmation,
+        "UnsubscribeConfirmation": LeanUnsubscribeConfirmation,
+    }
+
+    def decode(self, body: bytes) -> AnySNSPayload:
+        # pydantic_core's JSON parser is about twice as fast as the json
+        # module's, and doesn't need the rest of pydantic
+        from pydantic_core import from_json
+
+        try:
+            data = from_json(body)
+        except ValueError as e:
+            raise DecodeError("Invalid JSON: %s" % e) from None
+        if not isinstance(data, dict):
+            raise DecodeError("Expected a JSON object")
+        payload_class = self.payload_classes.get(str(data.get("Type")))
+        if payload_class is None:
+            raise DecodeError("Unknown Type %r" % (data.get("Type"),))
+        # Lean payloads stand in for the models they mirror
+        return cast("AnySNSPayload", payload_class(data))
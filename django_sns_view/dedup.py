@@ -0,0 +1,194 @@
+from collections import OrderedDict
+from typing import Any
+import threading
+import time
+
+from django.core.cache import caches
+
+
+class BaseDeduplicator:
+    """
+    Remembers which messages have already been handled so that SNS
+    redeliveries of the same MessageId can be skipped.
+
+    An id is recorded as in progress when first seen and as handled once
+    finished, so a redelivery that arrives while the first attempt is still
+    running isn't acknowledged before it is known whether that attempt
+    succeeds.
+    """
+
+    def seen(self, message_id: str) -> bool:
+        """
+        Record message_id as in progress, returning True if it was already
+        recorded.
+        """
+        raise NotImplementedError
+
+    def finish(self, message_id: str) -> None:
+        """
+        Record that message_id was handled.
+        """
+
+    def finished(self, message_id: str) -> bool:
+        """
+        Return whether the recorded message_id was handled, rather than
+        still being in progress. Deduplicators that don't track progress
+        treat every recorded id as handled.
+        """
+        return True
+
+    def forget(self, message_id: str) -> None:
+        """
+        Remove message_id, e.g. because handling it failed and the
+        redelivery should be handled.
+        """
+        raise NotImplementedError
+
+    async def aseen(self, message_id: str) -> bool:
+        return self.seen(message_id)
+
+    async def afinish(self, message_id: str) -> None:
+        self.finish(message_id)
+
+    async def afinished(self, message_id: str) -> bool:
+        return self.finished(message_id)
+
+    async def aforget(self, message_id: str) -> None:
+        self.forget(message_id)
+
+
+class LocMemDeduplicator(BaseDeduplicator):
+    """
+    Remember up to max_size handled message ids for ttl seconds in process
+    memory, evicting the least recently seen first. Ids in progress are
+    only remembered for pending_ttl seconds, so a redelivery is handled if
+    the process handling the first attempt died.
+    """
+
+    def __init__(
+        self, max_size: int = 10000, ttl: float = 3600, pending_ttl: float = 60
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        # Maps ids to when they expire and whether they were handled
+        self._seen: OrderedDict[str, tuple[float, bool]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, message_id: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(message_id)
+            if entry is not None and entry[0] > now:
+                self._seen.move_to_end(message_id)
+                return True
+            self._seen[message_id] = (now + self.pending_ttl, False)
+            self._seen.move_to_end(message_id)
+            self._evict(now)
+        return False
+
+    def finish(self, message_id: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._seen[message_id] = (now + self.ttl, True)
+            self._seen.move_to_end(message_id)
+            self._evict(now)
+
+    def finished(self, message_id: str) -> bool:
+        with self._lock:
+            entry = self._seen.get(message_id)
+        return entry is not None and entry[1] and entry[0] > time.monotonic()
+
+    def forget(self, message_id: str) -> None:
+        with self._lock:
+            self._seen.pop(message_id, None)
+
+    def _evict(self, now: float) -> None:
+        while len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+        # Entries are ordered by when they were last seen, so expired
+        # entries mostly collect at the front
+        while self._seen:
+            message_id, (expires, _) = next(iter(self._seen.items()))
+            if expires > now:
+                break
+            del self._seen[message_id]
+
+
+class DjangoCacheDeduplicator(LocMemDeduplicator):
+    """
+    Share seen message ids between processes and hosts using one of the
+    caches configured in the CACHES setting, in front of which recently
+    seen ids are kept in process memory. Use a DatabaseCache to keep them
+    in a database table.
+    """
+
+    PENDING = 1
+    FINISHED = 2
+
+    def __init__(
+        self,
+        cache_alias: str = "default",
+        key_prefix: str = "sns-message",
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self) -> Any:
+        return caches[self.cache_alias]
+
+    def make_key(self, message_id: str) -> str:
+        return "%s:%s" % (self.key_prefix, message_id)
+
+    def seen(self, message_id: str) -> bool:
+        if super().seen(message_id):
+            return True
+        added: bool = self.cache.add(
+            self.make_key(message_id), self.PENDING, self.pending_ttl
+        )
+        return not added
+
+    def finish(self, message_id: str) -> None:
+        super().finish(message_id)
+        self.cache.set(self.make_key(message_id), self.FINISHED, self.ttl)
+
+    def finished(self, message_id: str) -> bool:
+        if super().finished(message_id):
+            return True
+        return self._check_state(message_id, self.cache.get(self.make_key(message_id)))
+
+    def forget(self, message_id: str) -> None:
+        super().forget(message_id)
+        self.cache.delete(self.make_key(message_id))
+
+    async def aseen(self, message_id: str) -> bool:
+        if super().seen(message_id):
+            return True
+        added: bool = await self.cache.aadd(
+            self.make_key(message_id), self.PENDING, self.pending_ttl
+        )
+        return not added
+
+    async def afinish(self, message_id: str) -> None:
+        super().finish(message_id)
+        await self.cache.aset(self.make_key(message_id), self.FINISHED, self.ttl)
+
+    async def afinished(self, message_id: str) -> bool:
+        if super().finished(message_id):
+            return True
+        state = await self.cache.aget(self.make_key(message_id))
+        return self._check_state(message_id, state)
+
+    async def aforget(self, message_id: str) -> None:
+        super().forget(message_id)
+        await self.cache.adelete(self.make_key(message_id))
+
+    def _check_state(self, message_id: str, state: Any) -> bool:
+        if state is None:
+            # Another process's attempt failed, so don't remember it here
+            # either and let the next redelivery be handled
+            super().forget(message_id)
+        return bool(state == self.FINISHED)
@@ -0,0 +1,118 @@
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any
+import atexit
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundExecutor:
+    """
+    Run handlers outside of the request on a bounded pool of workers.
+
+    At most max_workers handlers run at once and at most max_pending
+    further handlers are queued; once full, submit returns False so the
+    caller can ask SNS to redeliver later. The pool is created lazily (and
+    again after a fork) and drained when the process exits.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_pending: int = 100,
+        executor_class: Callable[..., Executor] = ThreadPoolExecutor,
+        shutdown_timeout: float | None = 30,
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.executor_class = executor_class
+        self.shutdown_timeout = shutdown_timeout
+        self._executor: Executor | None = None
+        self._pid: int | None = None
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._idle = threading.Condition()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of handlers queued or running.
+        """
+        return self._pending
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        on_error: Callable[[BaseException], None] | None = None,
+    ) -> bool:
+        """
+        Queue fn(*args), returning False if the queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            return False
+        with self._idle:
+            self._pending += 1
+        try:
+            future = self.get_executor().submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda f: self._done(f, on_error))
+        return True
+
+    def get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = self.executor_class(max_workers=self.max_workers)
+                if self._pid is None:
+                    atexit.register(self.shutdown)
+                self._pid = os.getpid()
+            return self._executor
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """
+        Wait for all queued handlers to finish, returning False on timeout.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def shutdown(self) -> None:
+        """
+        Stop accepting work and wait for queued handlers to finish.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        if not self.drain(self.shutdown_timeout):
+            logger.warning(
+                "Shutting down with %s SNS messages still pending", self._pending
+            )
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _done(
+        self,
+        future: "Future[Any]",
+        on_error: Callable[[BaseException], None] | None,
+    ) -> None:
+        try:
+            error = None if future.cancelled() else future.exception()
+            if error is not None:
+                if on_error is not None:
+                    on_error(error)
+                else:
+                    logger.error("Background SNS handler failed", exc_info=error)
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        self._slots.release()
+        with self._idle:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
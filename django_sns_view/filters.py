@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from typing import TYPE_CHECKING, Any, Literal
+import json
+import operator
+
+if TYPE_CHECKING:
+    from .types import MessageAttribute, Notification
+
+_MISSING = object()
+
+_NUMERIC_OPERATORS = {
+    "=": operator.eq,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+
+class _Condition:
+    """
+    The values allowed for one key of a filter policy, compiled so a value
+    is matched with set lookups where possible.
+    """
+
+    def __init__(self, rules: Iterable[Any]) -> None:
+        self.strings: set[str] = set()
+        self.numbers: set[float] = set()
+        self.others: list[Any] = []
+        self.prefixes: list[str] = []
+        self.ranges: list[list[tuple[Any, float]]] = []
+        self.anything_but: list[_Condition] = []
+        self.exists: bool | None = None
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule: Any) -> None:
+        if isinstance(rule, str):
+            self.strings.add(rule)
+        elif isinstance(rule, (int, float)) and not isinstance(rule, bool):
+            self.numbers.add(float(rule))
+        elif not isinstance(rule, Mapping):
+            self.others.append(rule)
+        elif "prefix" in rule:
+            self.prefixes.append(rule["prefix"])
+        elif "numeric" in rule:
+            terms = rule["numeric"]
+            comparisons = []
+            for i in range(0, len(terms), 2):
+                try:
+                    op = _NUMERIC_OPERATORS[terms[i]]
+                except KeyError:
+                    raise ValueError("Unknown numeric operator %r" % terms[i]) from None
+                comparisons.append((op, float(terms[i + 1])))
+            self.ranges.append(comparisons)
+        elif "anything-but" in rule:
+            excluded = rule["anything-but"]
+            if isinstance(excluded, (str, int, float, Mapping)):
+                excluded = [excluded]
+            self.anything_but.append(_Condition(excluded))
+        elif "exists" in rule:
+            self.exists = bool(rule["exists"])
+        else:
+            raise ValueError("Unsupported filter policy rule %r" % (rule,))
+
+    def matches(self, value: Any) -> bool:
+        if value is _MISSING:
+            return self.exists is False
+        if self.exists:
+            return True
+        # A list matches if any of its elements do
+        if isinstance(value, list):
+            return any(self.matches_value(v) for v in value)
+        return self.matches_value(value)
+
+    def matches_value(self, value: Any) -> bool:
+        if isinstance(value, str):
+            if value in self.strings:
+                return True
+            if any(value.startswith(prefix) for prefix in self.prefixes):
+                return True
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            if float(value) in self.numbers:
+                return True
+            for comparisons in self.ranges:
+                if all(op(value, bound) for op, bound in comparisons):
+                    return True
+        elif value in self.others:
+            return True
+        return any(not c.matches_value(value) for c in self.anything_but)
+
+
+class FilterPolicy:
+    """
+    An SNS subscription filter policy evaluated locally, over either the
+    MessageAttributes or the JSON Message of a notification.
+
+    Every key of the policy must match, and a key matches if any of its
+    rules do: exact strings and numbers, {"prefix": ...},
+    {"numeric": [">=", 0, "<", 100]}, {"anything-but": [...]} and
+    {"exists": bool}. With scope "MessageBody" policies can be nested to
+    match nested keys of the message.
+    """
+
+    def __init__(
+        self,
+        policy: Mapping[str, Any],
+        scope: Literal["MessageAttributes", "MessageBody"] = "MessageAttributes",
+    ) -> None:
+        self.policy = policy
+        self.scope = scope
+        self.conditions = list(self._compile(policy, ()))
+        if scope == "MessageAttributes" and any(
+            len(path) > 1 for path, _ in self.conditions
+        ):
+            raise ValueError("Message attribute policies can't be nested")
+
+    def _compile(
+        self, policy: Mapping[str, Any], path: tuple[str, ...]
+    ) -> Iterable[tuple[tuple[str, ...], _Condition]]:
+        for key, rules in policy.items():
+            if isinstance(rules, Mapping):
+                yield from self._compile(rules, path + (key,))
+            elif isinstance(rules, list):
+                yield path + (key,), _Condition(rules)
+            else:
+                raise ValueError("The rules for %r must be a list" % key)
+
+    def matches(self, notification: Notification) -> bool:
+        if self.scope == "MessageBody":
+            try:
+                body = json.loads(notification.Message)
+            except ValueError:
+                return False
+            if not isinstance(body, dict):
+                return False
+            return all(
+                condition.matches(_lookup(body, path))
+                for path, condition in self.conditions
+            )
+        attributes = notification.MessageAttributes
+        return all(
+            condition.matches(_attribute_value(attributes.get(path[0])))
+            for path, condition in self.conditions
+        )
+
+
+def _lookup(body: dict[str, Any], path: tuple[str, ...]) -> Any:
+    value: Any = body
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+def _attribute_value(attribute: MessageAttribute | None) -> Any:
+    if attribute is None:
+        return _MISSING
+    if attribute.Type == "Number":
+        try:
+            return float(attribute.Value)
+        except ValueError:
+            return _MISSING
+    if attribute.Type == "String.Array":
+        try:
+            return json.loads(attribute.Value)
+        except ValueError:
+            return _MISSING
+    if attribute.Type == "String":
+        return attribute.Value
+    # Binary attributes are ignored by filter policies
+    return _MISSING
@@ -0,0 +1,76 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils.module_loading import import_string
+
+from ...sqs import MAX_BATCH_SIZE, SQSConsumer
+from ...views import SNSEndpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Long-poll an SQS queue subscribed to SNS topics, verifying each "
+        "message and handling it with an SNSEndpoint's handle_message."
+    )
+    # An SQS client to use instead of creating one with boto3
+    stealth_options = ("client",)
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "view", help="Dotted path of the SNSEndpoint subclass to handle with"
+        )
+        parser.add_argument("queue_url", help="URL of the SQS queue")
+        parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE)
+        parser.add_argument(
+            "--wait-time", type=int, default=20, help="Long poll seconds"
+        )
+        parser.add_argument("--visibility-timeout", type=int, default=None)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Messages of a batch handled at once",
+        )
+        parser.add_argument(
+            "--delete-rejected",
+            action="store_true",
+            help="Delete messages that fail validation instead of leaving them",
+        )
+        parser.add_argument(
+            "--endpoint-url", help="SQS endpoint, e.g. of a local stand-in"
+        )
+        parser.add_argument(
+            "--max-polls",
+            type=int,
+            default=None,
+            help="Stop after receiving this many batches",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            view_class = import_string(options["view"])
+        except ImportError as e:
+            raise CommandError(str(e)) from e
+        if not (isinstance(view_class, type) and issubclass(view_class, SNSEndpoint)):
+            raise CommandError("%s isn't an SNSEndpoint" % options["view"])
+
+        consumer = SQSConsumer(
+            view_class,
+            options["queue_url"],
+            client=options.get("client"),
+            batch_size=options["batch_size"],
+            wait_time=options["wait_time"],
+            visibility_timeout=options["visibility_timeout"],
+            concurrency=options["concurrency"],
+            delete_rejected=options["delete_rejected"],
+            endpoint_url=options["endpoint_url"],
+        )
+        try:
+            deleted, left = consumer.run(max_polls=options["max_polls"])
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Handled %s messages, %s left on the queue" % (deleted, left)
+            )
+        )
@@ -0,0 +1,62 @@
+from typing import Any
+import re
+
+from cryptography import x509
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils.encoding import smart_bytes
+from requests.exceptions import RequestException
+
+from ...bundle import write_cert_bundle
+from ...client import get_http_client
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetch SNS signing certificates into the bundle at SNS_CERT_BUNDLE so "
+        "they can be verified against without fetching them at request time."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "urls",
+            nargs="*",
+            help="Signing certificate URLs, defaults to SNS_CERT_BUNDLE_URLS",
+        )
+        parser.add_argument(
+            "--output",
+            default=getattr(settings, "SNS_CERT_BUNDLE", None),
+            help="Path of the bundle to write, defaults to SNS_CERT_BUNDLE",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        urls = options["urls"] or getattr(settings, "SNS_CERT_BUNDLE_URLS", [])
+        output = options["output"]
+        if not urls:
+            raise CommandError("No URLs given and SNS_CERT_BUNDLE_URLS is empty")
+        if not output:
+            raise CommandError("No --output given and SNS_CERT_BUNDLE isn't set")
+
+        pattern = getattr(
+            settings,
+            "SNS_CERT_DOMAIN_REGEX",
+            r"sns.[a-z0-9\-]+.amazonaws.com$",
+        )
+        client = get_http_client()
+        certs = {}
+        for url in urls:
+            host = url.split("://", 1)[-1].split("/", 1)[0]
+            if not re.search(pattern, host):
+                raise CommandError("Improper Certificate Location %s" % url)
+            try:
+                pem = smart_bytes(client.get(url).text)
+                x509.load_pem_x509_certificate(pem)
+            except (RequestException, ValueError) as e:
+                raise CommandError("Unable to fetch %s: %s" % (url, e)) from e
+            certs[url] = pem
+            self.stdout.write("Fetched %s" % url)
+
+        write_cert_bundle(output, certs)
+        self.stdout.write(
+            self.style.SUCCESS("Wrote %s certificates to %s" % (len(certs), output))
+        )
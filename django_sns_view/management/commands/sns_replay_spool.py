@@ -0,0 +1,73 @@
+from collections.abc import Callable, Collection
+from typing import Any
+import uuid
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils.module_loading import import_string
+
+from ...types import Notification
+from ...views import AsyncSNSEndpoint, SNSEndpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the notifications spooled by an SNS endpoint whose handler "
+        "failed, in batches and at a limited rate."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "view",
+            help="Dotted path of the SNSEndpoint or AsyncSNSEndpoint subclass with the spool",
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=None,
+            help="Maximum notifications replayed per second",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            view_class = import_string(options["view"])
+        except ImportError as e:
+            raise CommandError(str(e)) from e
+        if not (
+            isinstance(view_class, type)
+            and issubclass(view_class, (SNSEndpoint, AsyncSNSEndpoint))
+        ):
+            raise CommandError("%s isn't an SNS endpoint" % options["view"])
+        spool = view_class().get_spool()
+        if spool is None:
+            raise CommandError("%s has no spool" % options["view"])
+
+        def handle_batch(
+            notifications: list[Notification],
+        ) -> Collection[uuid.UUID] | None:
+            view = view_class()
+            handle_message: Callable[[Any, Notification], None]
+            if isinstance(view, AsyncSNSEndpoint):
+                handle_message = async_to_sync(view.handle_message)
+            else:
+                if view.get_batcher() is not None:
+                    return view.handle_messages(notifications)
+                handle_message = view.handle_message
+            failed = []
+            for notification in notifications:
+                try:
+                    handle_message(view.parse_message(notification), notification)
+                except Exception:
+                    self.stderr.write("Handling %s failed" % notification.MessageId)
+                    failed.append(notification.MessageId)
+            return failed
+
+        handled, failed = spool.replay(
+            handle_batch, batch_size=options["batch_size"], rate=options["rate"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Replayed %s notifications, %s failed" % (handled, failed)
+            )
+        )
@@ -0,0 +1,93 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+import threading
+import time
+
+type Labels = tuple[tuple[str, str], ...]
+
+
+class BaseMetrics:
+    """
+    Receives the timings and counters emitted while handling SNS messages.
+    The base class discards them.
+
+    Timings are emitted per stage: parse, domain_check, cert_fetch, verify,
+    filter, admission and handler. Counters are cert_cache_hits, cert_cache_misses,
+    duplicates, filter_matches, filter_drops, spooled, rejections (labelled
+    with the reason) and messages (labelled with the message type).
+    """
+
+    def timing(self, stage: str, seconds: float) -> None:
+        pass
+
+    def increment(self, name: str, value: int = 1, **labels: str) -> None:
+        pass
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timing(stage, time.perf_counter() - start)
+
+
+NULL_METRICS = BaseMetrics()
+
+
+class InMemoryMetrics(BaseMetrics):
+    """
+    Aggregate metrics in process memory, which can be rendered in the
+    Prometheus text format.
+    """
+
+    def __init__(self, prefix: str = "sns") -> None:
+        self.prefix = prefix
+        self.counters: dict[tuple[str, Labels], int] = {}
+        self.timings: dict[str, tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def timing(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            count, total = self.timings.get(stage, (0, 0.0))
+            self.timings[stage] = (count + 1, total + seconds)
+
+    def increment(self, name: str, value: int = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def get_count(self, name: str, **labels: str) -> int:
+        return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            timings = sorted(self.timings.items())
+        if timings:
+            name = "%s_stage_seconds" % self.prefix
+            lines.append("# TYPE %s summary" % name)
+            for stage, (count, total) in timings:
+                lines.append('%s_count{stage="%s"} %d' % (name, stage, count))
+                lines.append('%s_sum{stage="%s"} %r' % (name, stage, total))
+        seen = set()
+        for (counter, labels), value in counters:
+            name = "%s_%s_total" % (self.prefix, counter)
+            if name not in seen:
+                seen.add(name)
+                lines.append("# TYPE %s counter" % name)
+            rendered = ",".join(
+                '%s="%s"' % (k, v.replace("\\", "\\\\").replace('"', '\\"'))
+                for k, v in labels
+            )
+            if rendered:
+                lines.append("%s{%s} %d" % (name, rendered, value))
+            else:
+                lines.append("%s %d" % (name, value))
+        return "\n".join(lines) + "\n"
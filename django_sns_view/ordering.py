@@ -0,0 +1,64 @@
+from collections.abc import Callable, Hashable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+import threading
+
+
+class GroupDispatcher:
+    """
+    Process items in parallel across groups, but one at a time and in order
+    within a group, as FIFO topics require of messages sharing a
+    MessageGroupId.
+
+    Once an item fails the rest of its group is skipped, so they can be
+    retried after it instead of overtaking it. Items without a group are
+    each processed on their own. Up to max_workers groups are processed at
+    once on a pool that is created when first needed.
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def map(
+        self,
+        fn: Callable[[Any], bool],
+        items: Sequence[Any],
+        group: Callable[[Any], Hashable | None],
+    ) -> list[bool]:
+        """
+        Call fn, which returns whether it succeeded, for each item and
+        return the results in the order of items. Skipped items are False.
+        """
+        groups: dict[Hashable, list[int]] = {}
+        for i, item in enumerate(items):
+            key = group(item)
+            groups.setdefault(object() if key is None else key, []).append(i)
+        results = [False] * len(items)
+
+        def run(indexes: list[int]) -> None:
+            for i in indexes:
+                results[i] = fn(items[i])
+                if not results[i]:
+                    break
+
+        if self.max_workers > 1 and len(groups) > 1:
+            # Consume the results so errors are raised here
+            list(self.get_executor().map(run, groups.values()))
+        else:
+            for indexes in groups.values():
+                run(indexes)
+        return results
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
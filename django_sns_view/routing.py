@@ -0,0 +1,105 @@
+from collections.abc import Callable, Mapping
+from typing import Any
+import re
+import threading
+
+
+class Route:
+    """
+    What to do with notifications from the topics matching pattern. Options
+    are free for the endpoint or handler to use, e.g. per topic settings.
+    """
+
+    def __init__(
+        self,
+        pattern: str,
+        handler: Callable[..., Any] | None = None,
+        options: Mapping[str, Any] | None = None,
+    ) -> None:
+        self.pattern = pattern
+        self.handler = handler
+        self.options = dict(options or {})
+
+    def __repr__(self) -> str:
+        return "<Route %s>" % self.pattern
+
+
+class TopicRouter:
+    """
+    Map TopicArns to routes. Patterns are either exact ARNs or contain *
+    wildcards, which match within one ARN segment, e.g.
+    arn:aws:sns:*:123456789012:orders-*.
+
+    Exact ARNs are looked up in a dict. Wildcard patterns are compiled into
+    a single regex, tried in the order they were added, and the route found
+    for each ARN is remembered.
+    """
+
+    def __init__(self, max_cache_size: int = 1024) -> None:
+        self.max_cache_size = max_cache_size
+        self._exact: dict[str, Route] = {}
+        self._wildcards: list[Route] = []
+        self._regex: re.Pattern[str] | None = None
+        self._cache: dict[str, Route | None] = {}
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        pattern: str,
+        handler: Callable[..., Any] | None = None,
+        **options: Any,
+    ) -> Route:
+        route = Route(pattern, handler, options)
+        with self._lock:
+            if "*" in pattern:
+                self._wildcards.append(route)
+                self._regex = re.compile(
+                    "|".join(
+                        "(?P<r%d>%s)" % (i, _wildcard_regex(r.pattern))
+                        for i, r in enumerate(self._wildcards)
+                    )
+                )
+            else:
+                self._exact[pattern] = route
+            self._cache.clear()
+        return route
+
+    def route(
+        self, pattern: str, **options: Any
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """
+        Decorator adding the decorated function as the handler for pattern.
+        """
+
+        def decorator(handler: Callable[..., Any]) -> Callable[..., Any]:
+            self.add(pattern, handler, **options)
+            return handler
+
+        return decorator
+
+    def match(self, topic_arn: str) -> Route | None:
+        route = self._exact.get(topic_arn)
+        if route is not None:
+            return route
+        try:
+            return self._cache[topic_arn]
+        except KeyError:
+            pass
+        route = None
+        regex = self._regex
+        if regex is not None:
+            m = regex.fullmatch(topic_arn)
+            if m is not None and m.lastgroup is not None:
+                route = self._wildcards[int(m.lastgroup[1:])]
+        with self._lock:
+            if len(self._cache) >= self.max_cache_size:
+                self._cache.clear()
+            self._cache[topic_arn] = route
+        return route
+
+    def __contains__(self, topic_arn: object) -> bool:
+        return isinstance(topic_arn, str) and self.match(topic_arn) is not None
+
+
+def _wildcard_regex(pattern: str) -> str:
+    return "[^:]*".join(re.escape(part) for part in pattern.split("*"))
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Collection, Iterator
+from typing import TYPE_CHECKING, Any
+import json
+import logging
+import os
+import time
+import uuid
+
+if TYPE_CHECKING:
+    from .types import Notification
+
+logger = logging.getLogger(__name__)
+
+
+class SpooledNotification:
+    """
+    A spooled notification and how often its handler failed.
+    """
+
+    def __init__(
+        self, notification: Notification, attempts: int = 1, error: str = ""
+    ) -> None:
+        self.notification = notification
+        self.attempts = attempts
+        self.error = error
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "attempts": self.attempts,
+                "error": self.error,
+                "spooled_at": time.time(),
+                "notification": json.loads(self.notification.model_dump_json()),
+            }
+        )
+
+    @classmethod
+    def from_json(cls, line: str) -> "SpooledNotification":
+        from .types import Notification
+
+        record = json.loads(line)
+        return cls(
+            Notification.model_validate(record["notification"]),
+            record["attempts"],
+            record["error"],
+        )
+
+
+class FileSpool:
+    """
+    Keep verified notifications whose handler failed in an append-only file
+    of JSON lines, to be replayed later by replay or the sns_replay_spool
+    command. Notifications that still fail after max_attempts are moved to
+    the path + ".dead" file.
+
+    Writes are serialized with flock, so the file can be shared by the
+    processes on a host. fcntl is only imported when spooling, so the views
+    can still be imported where it isn't available.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 5, fsync: bool = True) -> None:
+        self.path = path
+        self.dead_path = path + ".dead"
+        self.max_attempts = max_attempts
+        self.fsync = fsync
+
+    def append(self, notification: Notification, error: BaseException | str) -> None:
+        self.write([SpooledNotification(notification, error=_describe(error))])
+
+    def write(
+        self, records: list[SpooledNotification], path: str | None = None
+    ) -> None:
+        import fcntl
+
+        path = path or self.path
+        data = "".join(record.to_json() + "\n" for record in records).encode("utf-8")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        while True:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                # The file may have been taken for replay while waiting for
+                # the lock, in which case append to the new one
+                try:
+                    same_file = os.stat(path).st_ino == os.fstat(fd).st_ino
+                except FileNotFoundError:
+                    same_file = False
+                if same_file:
+                    os.write(fd, data)
+                    if self.fsync:
+                        os.fsync(fd)
+                    return
+            finally:
+                os.close(fd)
+
+    def __len__(self) -> int:
+        try:
+            with open(self.path, "rb") as f:
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0
+
+    def take(self) -> str | None:
+        """
+        Move the spooled notifications aside so they can be replayed while
+        new ones are spooled, returning the path they were moved to.
+        """
+        import fcntl
+
+        taken_path = "%s.%s.replay" % (self.path, uuid.uuid4().hex)
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            os.replace(self.path, taken_path)
+        finally:
+            os.close(fd)
+        return taken_path
+
+    def read(self, path: str) -> Iterator[SpooledNotification]:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield SpooledNotification.from_json(line)
+
+    def replay(
+        self,
+        handle: Callable[[list[Notification]], Collection[uuid.UUID] | None],
+        batch_size: int = 100,
+        rate: float | None = None,
+    ) -> tuple[int, int]:
+        """
+        Pass the spooled notifications to handle in batches, at most rate
+        notifications per second. handle returns the MessageIds that failed,
+        if any, and if it raises the whole batch failed. Failed notifications
+        are spooled again. Returns how many were handled and how many failed.
+        """
+        taken_path = self.take()
+        if taken_path is None:
+            return 0, 0
+        handled = failed = 0
+        started = time.monotonic()
+        batch: list[SpooledNotification] = []
+        try:
+            for record in self.read(taken_path):
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    ok, bad = self._replay_batch(handle, batch)
+                    handled, failed, batch = handled + ok, failed + bad, []
+                    _throttle(started, handled + failed, rate)
+            if batch:
+                ok, bad = self._replay_batch(handle, batch)
+                handled, failed = handled + ok, failed + bad
+        except BaseException:
+            # Put back whatever wasn't replayed so it isn't lost
+            remaining = list(self.read(taken_path))[handled + failed :]
+            if remaining:
+                self.write(remaining)
+            os.remove(taken_path)
+            raise
+        os.remove(taken_path)
+        return handled, failed
+
+    def _replay_batch(
+        self,
+        handle: Callable[[list[Notification]], Collection[uuid.UUID] | None],
+        batch: list[SpooledNotification],
+    ) -> tuple[int, int]:
+        try:
+            failed_ids = handle([record.notification for record in batch]) or ()
+            error = "Reported as failed"
+        except Exception as e:
+            logger.exception("Replaying spooled SNS notifications failed")
+            failed_ids = [record.notification.MessageId for record in batch]
+            error = _describe(e)
+        retry, dead = [], []
+        for record in batch:
+            if record.notification.MessageId in failed_ids:
+                record.attempts += 1
+                record.error = error
+                if record.attempts >= self.max_attempts:
+                    dead.append(record)
+                else:
+                    retry.append(record)
+        if retry:
+            self.write(retry)
+        if dead:
+            logger.error("Moving %s SNS notifications to %s", len(dead), self.dead_path)
+            self.write(dead, self.dead_path)
+        return len(batch) - len(retry) - len(dead), len(retry) + len(dead)
+
+
+def _describe(error: Any) -> str:
+    if isinstance(error, BaseException):
+        return "%s: %s" % (type(error).__name__, error)
+    return str(error)
+
+
+def _throttle(started: float, count: int, rate: float | None) -> None:
+    if rate:
+        delay = started + count / rate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+import importlib
+import logging
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .ordering import GroupDispatcher
+from .validation import InvalidMessage
+
+if TYPE_CHECKING:
+    from .views import SNSEndpoint
+
+logger = logging.getLogger(__name__)
+
+# The most messages SQS returns from one ReceiveMessage call
+MAX_BATCH_SIZE = 10
+
+
+class SQSConsumer:
+    """
+    Long-poll an SQS queue subscribed to SNS topics and handle its messages
+    the way view_class handles the ones posted to it: each message's SNS
+    envelope is validated and verified, then passed to handle_payload so it
+    reaches handle_message (or handle_messages when the view has a batcher)
+    through the view's filter, deduplicator, admission controller and spool.
+    The view's executor isn't used, handlers run before the message is
+    deleted.
+
+    Handled messages are deleted in batches. Messages whose handler failed
+    are left to become visible again, and so are rejected ones unless
+    delete_rejected is set, so the queue's redrive policy can move them to a
+    dead-letter queue. With concurrency above 1 the messages of a batch are
+    handled in parallel, which also lets a batcher collect them.
+
+    On FIFO queues messages sharing a MessageGroupId are handled one at a
+    time and in order, while different groups are handled in parallel: the
+    next message of a group is only handled once the previous one's handler
+    returned. When one fails the rest of its group is left on the queue to
+    be received again after it.
+
+    client is a boto3 SQS client, or anything with the same receive_message
+    and delete_message_batch methods. boto3 is only imported, and needs to
+    be installed, when no client is given.
+    """
+
+    def __init__(
+        self,
+        view_class: type[SNSEndpoint],
+        queue_url: str,
+        client: Any = None,
+        batch_size: int = MAX_BATCH_SIZE,
+        wait_time: int = 20,
+        visibility_timeout: int | None = None,
+        concurrency: int = 1,
+        delete_rejected: bool = False,
+        endpoint_url: str | None = None,
+    ) -> None:
+        self.view_class = view_class
+        self.queue_url = queue_url
+        self.client = client
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.wait_time = wait_time
+        self.visibility_timeout = visibility_timeout
+        self.concurrency = concurrency
+        self.delete_rejected = delete_rejected
+        self.endpoint_url = endpoint_url
+        self.fifo = queue_url.endswith(".fifo")
+        self.dispatcher = GroupDispatcher(max_workers=concurrency)
+
+    def get_client(self) -> Any:
+        if self.client is None:
+            try:
+                boto3 = importlib.import_module("boto3")
+            except ImportError:
+                raise ImproperlyConfigured(
+                    "boto3 must be installed to consume SQS queues, "
+                    "e.g. with pip install django-sns-view[sqs]"
+                ) from None
+            self.client = boto3.client("sqs", endpoint_url=self.endpoint_url)
+        return self.client
+
+    def receive(self) -> list[dict[str, Any]]:
+        options: dict[str, Any] = {
+            "QueueUrl": self.queue_url,
+            "MaxNumberOfMessages": self.batch_size,
+            "WaitTimeSeconds": self.wait_time,
+        }
+        if self.visibility_timeout is not None:
+            options["VisibilityTimeout"] = self.visibility_timeout
+        if self.fifo:
+            options["MessageSystemAttributeNames"] = ["MessageGroupId"]
+        messages: list[dict[str, Any]] = (
+            self.get_client().receive_message(**options).get("Messages", [])
+        )
+        return messages
+
+    def get_group(self, message: dict[str, Any]) -> str | None:
+        group: str | None = message.get("Attributes", {}).get("MessageGroupId")
+        return group
+
+    def process(self, message: dict[str, Any]) -> bool:
+        """
+        Validate and handle one SQS message, returning whether it should be
+        deleted.
+        """
+        # The view's executor would acknowledge the message before its
+        # handler ran, handle it inline so it's only deleted once handled
+        view = self.view_class(use_deduplication_id=True, executor=None)
+        body = message["Body"].encode("utf-8")
+        try:
+            payload = view.get_validator().validate(body)
+        except InvalidMessage as e:
+            view.get_metrics().increment("rejections", reason=e.reason)
+            logger.warning("Rejected SQS message %s: %s", message["MessageId"], e)
+            return self.delete_rejected
+        except Exception:
+            # e.g. the certificate couldn't be fetched, leave the message for
+            # the queue's redrive policy rather than stopping the consumer
+            logger.exception("Validating SQS message %s failed", message["MessageId"])
+            return False
+        try:
+            response = view.handle_payload(body, payload)
+        except Exception:
+            logger.exception("Handling SQS message %s failed", message["MessageId"])
+            return False
+        if response.status_code >= 500:
+            # e.g. the admission controller turned it away, try again later
+            return False
+        return response.status_code < 300 or self.delete_rejected
+
+    def delete(self, messages: list[dict[str, Any]]) -> int:
+        """
+        Delete messages from the queue, returning how many were deleted.
+        """
+        if not messages:
+            return 0
+        response = self.get_client().delete_message_batch(
+            QueueUrl=self.queue_url,
+            Entries=[
+                {"Id": str(i), "ReceiptHandle": message["ReceiptHandle"]}
+                for i, message in enumerate(messages)
+            ],
+        )
+        failed = response.get("Failed", [])
+        for failure in failed:
+            logger.error(
+                "Unable to delete SQS message: %s", failure.get("Message", failure)
+            )
+        return len(messages) - len(failed)
+
+    def poll(self) -> tuple[int, int]:
+        """
+        Receive and handle one batch of messages, returning how many were
+        deleted and how many were left on the queue.
+        """
+        messages = self.receive()
+        results = self.dispatcher.map(self.process, messages, self.get_group)
+        deleted = self.delete(
+            [message for message, done in zip(messages, results) if done]
+        )
+        return deleted, len(messages) - deleted
+
+    def run(
+        self, max_polls: int | None = None, stop: threading.Event | None = None
+    ) -> tuple[int, int]:
+        """
+        Poll until stop is set or max_polls batches were received, returning
+        the totals of poll.
+        """
+        deleted = left = polls = 0
+        try:
+            while (max_polls is None or polls < max_polls) and not (
+                stop is not None and stop.is_set()
+            ):
+                batch_deleted, batch_left = self.poll()
+                deleted += batch_deleted
+                left += batch_left
+                polls += 1
+        finally:
+            self.dispatcher.shutdown()
+        return deleted, left
@@ -1,10 +1,21 @@
+from datetime import UTC, datetime, timedelta
+from typing import Any
+import base64
 import os
 
 from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.serialization import Encoding
 from django.conf import settings
 from django.test import TestCase, override_settings
 
 from ..types import Notification, SubscriptionConfirmation, UnsubscribeConfirmation
+from ..utils import (
+    NOTIFICATION_HASH_FORMAT,
+    NOTIFICATION_HASH_FORMAT_NO_SUBJECT,
+    SUBSCRIPTION_HASH_FORMAT,
+)
 from .test_data.notifications import (
     SNS_NOTIFICATION,
     SNS_NOTIFICATION_NO_SUBJECT,
@@ -15,7 +26,56 @@ from .test_data.notifications import (
 DIRNAME, _ = os.path.split(os.path.abspath(__file__))
 
 
-@override_settings(SNS_STORY_TOPIC_ARN=["arn:aws:sns:us-west-2:123456789012:MyTopic"])
+def make_certificate(
+    valid_for: timedelta = timedelta(days=1),
+) -> tuple[rsa.RSAPrivateKey, bytes]:
+    """
+    Create a self signed certificate, returning its key and PEM.
+    """
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(x509.NameOID.COMMON_NAME, "sns.test")])
+    now = datetime.now(UTC)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(minutes=1))
+        .not_valid_after(now + valid_for)
+        .sign(key, hashes.SHA256())
+    )
+    return key, cert.public_bytes(Encoding.PEM)
+
+
+def sign_payload(
+    payload: dict[str, Any],
+    key: rsa.RSAPrivateKey,
+    signature_version: str = "1",
+) -> dict[str, Any]:
+    """
+    Return a copy of payload signed the way SNS signs messages.
+    """
+    payload = dict(payload, SignatureVersion=signature_version)
+    if payload["Type"] != "Notification":
+        hash_format = SUBSCRIPTION_HASH_FORMAT
+    elif payload.get("Subject") is not None:
+        hash_format = NOTIFICATION_HASH_FORMAT
+    else:
+        hash_format = NOTIFICATION_HASH_FORMAT_NO_SUBJECT
+    hash_type = hashes.SHA1() if signature_version == "1" else hashes.SHA256()
+    signature = key.sign(
+        hash_format.format(**payload).encode("utf-8"),
+        padding.PKCS1v15(),
+        hash_type,
+    )
+    payload["Signature"] = base64.b64encode(signature).decode("ascii")
+    return payload
+
+
+@override_settings(
+    SNS_STORY_TOPIC_ARN=["arn:aws:sns:ap-southeast-2:919599206538:test-example"]
+)
 class SNSBaseTest(TestCase):
     old_topics = getattr(settings, "", None)
 
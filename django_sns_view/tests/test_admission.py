@@ -0,0 +1,62 @@
+from unittest import TestCase
+import threading
+
+from ..admission import AdmissionController
+
+TOPIC = "arn:aws:sns:us-east-1:123456789012:orders"
+OTHER_TOPIC = "arn:aws:sns:us-east-1:123456789012:audit"
+
+
+class AdmissionControllerTest(TestCase):
+    def test_global_limit(self) -> None:
+        """Test notifications are refused over the global limit"""
+        admission = AdmissionController(max_concurrent=2)
+        self.assertTrue(admission.acquire(TOPIC))
+        self.assertTrue(admission.acquire(OTHER_TOPIC))
+        self.assertFalse(admission.acquire(TOPIC))
+        admission.release(TOPIC)
+        self.assertTrue(admission.acquire(TOPIC))
+        self.assertEqual(admission.active, 2)
+
+    def test_topic_limits(self) -> None:
+        """Test a busy topic doesn't stop other topics being admitted"""
+        admission = AdmissionController(
+            max_concurrent_per_topic=1, topic_limits={OTHER_TOPIC: 2}
+        )
+        self.assertTrue(admission.acquire(TOPIC))
+        self.assertFalse(admission.acquire(TOPIC))
+        self.assertTrue(admission.acquire(OTHER_TOPIC))
+        self.assertTrue(admission.acquire(OTHER_TOPIC))
+        self.assertFalse(admission.acquire(OTHER_TOPIC))
+
+    def test_queued_until_released(self) -> None:
+        """Test a queued notification is admitted once a slot is released"""
+        admission = AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=5)
+        admission.acquire(TOPIC)
+        results: list[bool] = []
+        waiter = threading.Thread(
+            target=lambda: results.append(admission.acquire(TOPIC))
+        )
+        waiter.start()
+        while admission.queued == 0:
+            threading.Event().wait(0.001)
+        # The queue budget is used up
+        self.assertFalse(admission.acquire(TOPIC))
+        admission.release(TOPIC)
+        waiter.join(timeout=5)
+        self.assertEqual(results, [True])
+
+    def test_queue_timeout(self) -> None:
+        """Test a queued notification is refused after queue_timeout"""
+        admission = AdmissionController(
+            max_concurrent=1, max_queued=1, queue_timeout=0.01
+        )
+        admission.acquire(TOPIC)
+        self.assertFalse(admission.acquire(TOPIC))
+        self.assertEqual(admission.queued, 0)
+
+    def test_non_blocking(self) -> None:
+        """Test notifications aren't queued without block"""
+        admission = AdmissionController(max_concurrent=1, max_queued=1, queue_timeout=5)
+        admission.acquire(TOPIC)
+        self.assertFalse(admission.acquire(TOPIC, block=False))
@@ -0,0 +1,74 @@
+from unittest.mock import MagicMock, patch
+import logging
+import queue
+
+from django.test import SimpleTestCase
+
+from ..audit import (
+    AuditLogger,
+    DroppingQueueHandler,
+    LazyPayload,
+    start_queue_logging,
+)
+from ..types import Notification
+from .test_data.notifications import SNS_NOTIFICATION
+
+
+class AuditLoggerTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.payload = Notification.model_validate(SNS_NOTIFICATION)
+        self.body = self.payload.model_dump_json().encode()
+
+    def test_truncated_lazily(self) -> None:
+        """Test the body is only serialized, truncated, when emitted"""
+        audit = AuditLogger(logger_name="sns.audit.test", max_length=10)
+        with self.assertLogs("sns.audit.test") as logs:
+            with patch.object(Notification, "model_dump_json") as dump:
+                audit.log_notification(self.body, self.payload)
+                dump.assert_not_called()
+        record = logs.records[0]
+        self.assertEqual(record.topic_arn, self.payload.TopicArn)  # type:ignore[attr-defined]
+        self.assertTrue(str(record.sns_payload).startswith(self.body[:10].decode()))  # type:ignore[attr-defined]
+        self.assertIn("more characters", str(record.sns_payload))  # type:ignore[attr-defined]
+        self.assertIsInstance(record.payload_message, LazyPayload)  # type:ignore[attr-defined]
+
+    def test_sampled(self) -> None:
+        """Test only sample_rate of notifications are logged"""
+        audit = AuditLogger(logger_name="sns.audit.test", sample_rate=0.5)
+        with patch("django_sns_view.audit.random.random", side_effect=[0.2, 0.7]):
+            with self.assertLogs("sns.audit.test") as logs:
+                audit.log_notification(self.body, self.payload)
+                audit.log_notification(self.body, self.payload)
+        self.assertEqual(len(logs.records), 1)
+
+    def test_disabled_level_skipped(self) -> None:
+        """Test nothing is built when the level isn't enabled"""
+        audit = AuditLogger(logger_name="sns.audit.test", level=logging.DEBUG)
+        logging.getLogger("sns.audit.test").setLevel(logging.INFO)
+        self.addCleanup(logging.getLogger("sns.audit.test").setLevel, logging.NOTSET)
+        with patch.object(audit.logger, "log") as log:
+            audit.log_notification(self.body, self.payload)
+        log.assert_not_called()
+
+
+class QueueLoggingTest(SimpleTestCase):
+    def test_handlers_moved_to_listener(self) -> None:
+        """Test records reach the handlers through the queue"""
+        logger = logging.getLogger("sns.queue.test")
+        handler = MagicMock(spec=logging.Handler, level=logging.NOTSET)
+        logger.addHandler(handler)
+        listener = start_queue_logging(logger_name="sns.queue.test")
+        self.addCleanup(logger.handlers.clear)
+        self.assertNotIn(handler, logger.handlers)
+
+        logger.warning("hello")
+        listener.stop()
+        handler.handle.assert_called_once()
+
+    def test_full_queue_drops(self) -> None:
+        """Test records are dropped rather than blocking when the queue is full"""
+        handler = DroppingQueueHandler(queue.Queue(1))
+        record = logging.makeLogRecord({"msg": "hello"})
+        handler.emit(record)
+        handler.emit(record)
+        self.assertEqual(handler.dropped, 1)
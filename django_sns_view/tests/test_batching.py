@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+import uuid
+
+from ..batching import BatchItemFailed, MessageBatcher
+from ..types import Notification
+from .test_data.notifications import SNS_NOTIFICATION
+
+
+def make_notifications(count: int) -> list[Notification]:
+    return [
+        Notification.model_validate(dict(SNS_NOTIFICATION, MessageId=str(uuid.uuid4())))
+        for _ in range(count)
+    ]
+
+
+class MessageBatcherTest(TestCase):
+    def test_full_batch_flushed_together(self) -> None:
+        """Test concurrent submissions are flushed as one batch"""
+        batcher = MessageBatcher(max_size=4, max_wait=5)
+        batches: list[list[Notification]] = []
+        notifications = make_notifications(4)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [
+                pool.submit(batcher.submit, "key", batches.append, n)
+                for n in notifications
+            ]
+            for future in futures:
+                future.result(timeout=5)
+        self.assertEqual(len(batches), 1)
+        self.assertCountEqual(batches[0], notifications)
+
+    def test_flushed_after_max_wait(self) -> None:
+        """Test a batch that doesn't fill up is flushed after max_wait"""
+        batcher = MessageBatcher(max_size=100, max_wait=0.01)
+        batches: list[list[Notification]] = []
+        (notification,) = make_notifications(1)
+        batcher.submit("key", batches.append, notification)
+        self.assertEqual(batches, [[notification]])
+
+    def test_failed_items(self) -> None:
+        """Test only the notifications reported as failed raise"""
+        batcher = MessageBatcher(max_size=2, max_wait=5)
+        ok, failed = make_notifications(2)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [
+                pool.submit(batcher.submit, "key", lambda batch: [failed], n)
+                for n in (ok, failed)
+            ]
+            self.assertIsNone(futures[0].result(timeout=5))
+            with self.assertRaises(BatchItemFailed):
+                futures[1].result(timeout=5)
+
+    def test_flush_error_raised_for_every_item(self) -> None:
+        """Test an error raised by the flush fails the whole batch"""
+        batcher = MessageBatcher(max_size=1)
+
+        def flush(batch: list[Notification]) -> None:
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            batcher.submit("key", flush, make_notifications(1)[0])
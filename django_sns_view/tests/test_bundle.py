@@ -0,0 +1,111 @@
+from io import StringIO
+from typing import cast
+from unittest.mock import MagicMock, Mock, patch
+import json
+import os
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from ..bundle import (
+    UnknownCertificateError,
+    load_cert_bundle,
+    read_cert_bundle,
+    write_cert_bundle,
+)
+from ..certs import LocMemCertStore, get_cert_store
+from ..utils import get_x509_cert, verified_signatures
+from ..views import SNSEndpoint
+from .helpers import SNSBaseTest, make_certificate
+from .test_data.notifications import SNS_NOTIFICATION
+
+URL = "https://sns.us-east-1.amazonaws.com/SimpleNotificationService-1.pem"
+OTHER_URL = "https://sns.eu-west-1.amazonaws.com/SimpleNotificationService-2.pem"
+
+
+class CertBundleTest(SNSBaseTest):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "sns-certs.pem")
+        _, self.pem = make_certificate()
+        _, self.other_pem = make_certificate()
+        get_cert_store().clear()
+
+    def test_round_trip(self) -> None:
+        """Test a written bundle reads back keyed by URL"""
+        write_cert_bundle(self.path, {URL: self.pem, OTHER_URL: self.other_pem})
+        self.assertEqual(
+            read_cert_bundle(self.path), {URL: self.pem, OTHER_URL: self.other_pem}
+        )
+
+    @patch("django_sns_view.client.HTTPClient.get")
+    def test_served_from_bundle(self, mock: MagicMock) -> None:
+        """Test bundled certificates are used without a network request"""
+        write_cert_bundle(self.path, {URL: self.pem})
+        with override_settings(SNS_CERT_BUNDLE=self.path):
+            get_x509_cert(URL)
+        mock.assert_not_called()
+
+    @patch("django_sns_view.client.HTTPClient.get")
+    def test_network_fallback(self, mock: MagicMock) -> None:
+        """Test certificates missing from the bundle are fetched"""
+        mock.return_value = Mock(text=self.other_pem.decode())
+        write_cert_bundle(self.path, {URL: self.pem})
+        with override_settings(SNS_CERT_BUNDLE=self.path):
+            get_x509_cert(OTHER_URL)
+        mock.assert_called_once_with(OTHER_URL)
+
+        with override_settings(
+            SNS_CERT_BUNDLE=self.path, SNS_CERT_NETWORK_FALLBACK=False
+        ):
+            get_cert_store().clear()
+            with self.assertRaises(UnknownCertificateError):
+                get_x509_cert(OTHER_URL)
+
+    @patch("django_sns_view.client.HTTPClient.get")
+    def test_unknown_certificate_rejected(self, mock: MagicMock) -> None:
+        """Test offline, certificates missing from the bundle are rejected"""
+        verified_signatures.clear()
+        write_cert_bundle(self.path, {URL: self.pem})
+        request = RequestFactory().post("/")
+        request._body = json.dumps(SNS_NOTIFICATION).encode()
+        with override_settings(
+            SNS_CERT_BUNDLE=self.path,
+            SNS_CERT_NETWORK_FALLBACK=False,
+            SNS_VERIFY_CERTIFICATE=True,
+        ):
+            response = cast(HttpResponse, SNSEndpoint.as_view()(request))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.content.decode("ascii"), "Unknown Certificate")
+        mock.assert_not_called()
+
+    def test_load_cert_bundle(self) -> None:
+        """Test the bundle can warm a certificate store"""
+        write_cert_bundle(self.path, {URL: self.pem, OTHER_URL: self.other_pem})
+        store = LocMemCertStore()
+        with override_settings(SNS_CERT_BUNDLE=self.path):
+            self.assertEqual(load_cert_bundle(store), 2)
+        fetch = MagicMock()
+        store.get_certificate(URL, fetch)
+        fetch.assert_not_called()
+
+    @patch("django_sns_view.client.HTTPClient.get")
+    def test_fetch_command(self, mock: MagicMock) -> None:
+        """Test the management command writes the bundle"""
+        mock.return_value = Mock(text=self.pem.decode())
+        with override_settings(SNS_CERT_BUNDLE_URLS=[URL]):
+            call_command("sns_fetch_certs", output=self.path, stdout=StringIO())
+        self.assertEqual(read_cert_bundle(self.path), {URL: self.pem})
+
+    def test_fetch_command_bad_domain(self) -> None:
+        """Test the management command only fetches from SNS domains"""
+        with self.assertRaises(CommandError):
+            call_command(
+                "sns_fetch_certs",
+                "https://example.com/cert.pem",
+                output=self.path,
+                stdout=StringIO(),
+            )
@@ -0,0 +1,139 @@
+from datetime import timedelta
+from unittest.mock import MagicMock
+import asyncio
+import tempfile
+import threading
+import time
+
+from cryptography import x509
+from django.core.cache import cache
+from django.test import override_settings
+
+from ..certs import (
+    DjangoCacheCertStore,
+    FileCertStore,
+    LocMemCertStore,
+    get_cert_store,
+)
+from .helpers import SNSBaseTest, make_certificate
+
+CERT_URL = "https://sns.us-east-1.amazonaws.com/cert.pem"
+
+
+class CertStoreTest(SNSBaseTest):
+    def setUp(self) -> None:
+        cache.clear()
+        _, self.valid_pem = make_certificate()
+        self.fetch = MagicMock(return_value=self.valid_pem)
+
+    def test_locmem_caches_certificate(self) -> None:
+        """Test a certificate is only fetched once per process"""
+        store = LocMemCertStore()
+        first = store.get_certificate(CERT_URL, self.fetch)
+        second = store.get_certificate(CERT_URL, self.fetch)
+        self.assertIsInstance(first, x509.Certificate)
+        self.assertIs(first, second)
+        self.fetch.assert_called_once_with(CERT_URL)
+
+    def test_expired_certificate_not_cached(self) -> None:
+        """Test an expired certificate is fetched again on every call"""
+        self.fetch.return_value = self.pemfile
+        store = LocMemCertStore()
+        store.get_certificate(CERT_URL, self.fetch)
+        store.get_certificate(CERT_URL, self.fetch)
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_ttl_capped_by_max_ttl(self) -> None:
+        """Test the TTL is derived from the certificate but capped"""
+        _, pem = make_certificate(valid_for=timedelta(hours=1))
+        cert = x509.load_pem_x509_certificate(pem)
+        self.assertAlmostEqual(LocMemCertStore().get_ttl(cert), 3600, delta=120)
+        self.assertEqual(LocMemCertStore(max_ttl=60).get_ttl(cert), 60)
+
+    def test_locmem_bounded(self) -> None:
+        """Test the least recently used certificates are evicted past max_size"""
+        store = LocMemCertStore(max_size=2)
+        urls = [CERT_URL.replace("cert", "cert%d" % i) for i in range(3)]
+        store.get_certificate(urls[0], self.fetch)
+        store.get_certificate(urls[1], self.fetch)
+        store.get_certificate(urls[0], self.fetch)
+        store.get_certificate(urls[2], self.fetch)
+        self.assertEqual(list(store._local), [urls[0], urls[2]])
+        self.assertEqual(store._locks, {})
+
+    def test_django_cache_shared_between_stores(self) -> None:
+        """Test a certificate fetched by one process is reused by another"""
+        DjangoCacheCertStore().get_certificate(CERT_URL, self.fetch)
+        DjangoCacheCertStore().get_certificate(CERT_URL, self.fetch)
+        self.fetch.assert_called_once_with(CERT_URL)
+
+    def test_django_cache_waits_for_other_fetcher(self) -> None:
+        """Test a miss waits on another process holding the fetch lock"""
+        other = DjangoCacheCertStore()
+        store = DjangoCacheCertStore(poll_interval=0.01)
+        self.assertTrue(other.acquire_fetch_lock(CERT_URL))
+        threading.Timer(0.05, other.set, (CERT_URL, self.valid_pem, 60)).start()
+        cert = store.get_certificate(CERT_URL, self.fetch)
+        self.assertIsInstance(cert, x509.Certificate)
+        self.fetch.assert_not_called()
+
+    def test_file_store_shared_between_stores(self) -> None:
+        """Test certificates are shared through the file store's directory"""
+        with tempfile.TemporaryDirectory() as directory:
+            FileCertStore(directory).get_certificate(CERT_URL, self.fetch)
+            store = FileCertStore(directory)
+            self.assertEqual(store.get(CERT_URL), self.valid_pem)
+            store.get_certificate(CERT_URL, self.fetch)
+            self.fetch.assert_called_once_with(CERT_URL)
+
+            store.set(CERT_URL, self.valid_pem, 0.01)
+            time.sleep(0.02)
+            self.assertIsNone(store.get(CERT_URL))
+
+    def test_concurrent_misses_single_fetch(self) -> None:
+        """Test concurrent misses for one URL result in a single fetch"""
+
+        def slow_fetch(cert_url: str) -> bytes:
+            time.sleep(0.05)
+            return self.valid_pem
+
+        self.fetch.side_effect = slow_fetch
+        store = LocMemCertStore()
+        threads = [
+            threading.Thread(target=store.get_certificate, args=(CERT_URL, self.fetch))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.fetch.assert_called_once_with(CERT_URL)
+        self.assertEqual(store._locks, {})
+
+    async def test_async_concurrent_misses_single_fetch(self) -> None:
+        """Test concurrent async misses for one URL result in a single fetch"""
+        calls = []
+
+        async def fetch(cert_url: str) -> bytes:
+            calls.append(cert_url)
+            await asyncio.sleep(0.05)
+            return self.valid_pem
+
+        store = LocMemCertStore()
+        certs = await asyncio.gather(
+            *(store.aget_certificate(CERT_URL, fetch) for _ in range(5))
+        )
+        self.assertEqual(calls, [CERT_URL])
+        self.assertEqual(len({cert.serial_number for cert in certs}), 1)
+
+    @override_settings(
+        SNS_CERT_STORE={
+            "BACKEND": "django_sns_view.certs.DjangoCacheCertStore",
+            "OPTIONS": {"key_prefix": "test"},
+        }
+    )
+    def test_get_cert_store_from_settings(self) -> None:
+        """Test the configured store is used"""
+        store = get_cert_store()
+        assert isinstance(store, DjangoCacheCertStore)
+        self.assertEqual(store.key_prefix, "test")
@@ -0,0 +1,97 @@
+from unittest.mock import MagicMock, Mock, patch
+
+from django.test import SimpleTestCase, override_settings
+from requests.exceptions import ConnectionError, HTTPError
+import requests
+
+from ..client import CircuitOpenError, HTTPClient, get_http_client
+
+URL = "https://sns.us-east-1.amazonaws.com/cert.pem"
+
+
+def error_response(status: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.url = URL
+    return response
+
+
+class HTTPClientTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.http_client = HTTPClient(
+            failure_threshold=2, reset_timeout=60, negative_ttl=0
+        )
+        patcher = patch.object(requests.Session, "get")
+        self.session_get = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_timeouts(self) -> None:
+        """Test requests are made with connect and read timeouts"""
+        self.session_get.return_value = Mock(status_code=200)
+        client = HTTPClient(connect_timeout=1, read_timeout=2)
+        client.get(URL)
+        self.session_get.assert_called_once_with(URL, timeout=(1, 2))
+
+    def test_session_reused(self) -> None:
+        """Test connections are pooled in one session"""
+        self.assertIs(self.http_client.session, self.http_client.session)
+        adapter = self.http_client.session.get_adapter(URL)
+        self.assertEqual(adapter.max_retries.total, 2)  # type:ignore[attr-defined]
+
+    def test_circuit_opens(self) -> None:
+        """Test a host fails fast after consecutive failures"""
+        self.session_get.side_effect = ConnectionError("down")
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                self.http_client.get(URL)
+        with self.assertRaises(CircuitOpenError):
+            self.http_client.get(URL)
+        self.assertEqual(self.session_get.call_count, 2)
+
+    @patch("django_sns_view.client.time.monotonic")
+    def test_circuit_closes(self, monotonic: MagicMock) -> None:
+        """Test the circuit is tried again after reset_timeout and closes"""
+        monotonic.return_value = 0
+        self.session_get.side_effect = ConnectionError("down")
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                self.http_client.get(URL)
+
+        monotonic.return_value = 61
+        self.session_get.side_effect = None
+        self.session_get.return_value = Mock(status_code=200)
+        self.http_client.get(URL)
+        self.http_client.get(URL)
+        self.assertEqual(self.session_get.call_count, 4)
+
+    def test_client_errors_dont_open_circuit(self) -> None:
+        """Test 4xx responses only negatively cache the URL"""
+        response = error_response(404)
+        self.session_get.return_value = response
+        client = HTTPClient(failure_threshold=1, negative_ttl=60)
+        with self.assertRaises(HTTPError):
+            client.get(URL)
+        with self.assertRaises(CircuitOpenError):
+            client.get(URL)
+        self.session_get.return_value = Mock(status_code=200)
+        client.get(URL + "?other")
+
+    @override_settings(SNS_HTTP_CLIENT={"read_timeout": 1})
+    def test_get_http_client_from_settings(self) -> None:
+        """Test the client is configured by settings"""
+        self.assertEqual(get_http_client().read_timeout, 1)
+
+    async def test_aget(self) -> None:
+        """Test the async client uses the pooled session and returns the body"""
+        self.session_get.return_value = Mock(status_code=200, content=b"body")
+        self.assertEqual(await self.http_client.aget(URL), b"body")
+        self.session_get.assert_called_once_with(URL, timeout=(3.05, 10))
+
+    async def test_aget_error_status(self) -> None:
+        """Test an error status raises an HTTPError and counts as a failure"""
+        self.session_get.return_value = error_response(503)
+        for _ in range(2):
+            with self.assertRaises(HTTPError):
+                await self.http_client.aget(URL)
+        with self.assertRaises(CircuitOpenError):
+            await self.http_client.aget(URL)
@@ -0,0 +1,67 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from requests import Response
+from requests.exceptions import ConnectionError, HTTPError
+
+from ..confirmations import ConfirmationManager
+from ..executors import BackgroundExecutor
+from ..types import SubscriptionConfirmation
+from .test_data.notifications import SNS_SUBSCRIPTION_NOTIFICATION
+
+
+def http_error(status: int) -> HTTPError:
+    response = Response()
+    response.status_code = status
+    return HTTPError(response=response)
+
+
+@patch("django_sns_view.client.HTTPClient.get")
+class ConfirmationManagerTest(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.executor = BackgroundExecutor(max_workers=1)
+        self.addCleanup(self.executor.shutdown)
+        self.manager = ConfirmationManager(executor=self.executor)
+        self.payload = SubscriptionConfirmation.model_validate(
+            SNS_SUBSCRIPTION_NOTIFICATION
+        )
+
+    def test_confirmed_once(self, mock: MagicMock) -> None:
+        """Test repeated confirmations of a subscription only GET it once"""
+        self.assertTrue(self.manager.submit(self.payload))
+        self.assertTrue(self.manager.submit(self.payload))
+        self.executor.drain(timeout=5)
+        self.assertTrue(self.manager.submit(self.payload))
+        self.executor.drain(timeout=5)
+        mock.assert_called_once_with(str(self.payload.SubscribeURL))
+        self.assertTrue(self.manager.is_confirmed(self.payload.TopicArn))
+
+    def test_retries_left_to_client(self, mock: MagicMock) -> None:
+        """Test failures the HTTP client already retried aren't retried again"""
+        mock.side_effect = [ConnectionError(), http_error(503)]
+        for _ in range(2):
+            self.manager.submit(self.payload)
+            self.executor.drain(timeout=5)
+        self.assertEqual(mock.call_count, 2)
+        self.assertFalse(self.manager.is_confirmed(self.payload.TopicArn))
+
+    def test_failure_released(self, mock: MagicMock) -> None:
+        """Test a failed confirmation is tried again on redelivery"""
+        mock.side_effect = [http_error(404), None]
+        self.manager.submit(self.payload)
+        self.executor.drain(timeout=5)
+        self.assertEqual(mock.call_count, 1)
+        self.assertFalse(self.manager.is_confirmed(self.payload.TopicArn))
+
+        self.manager.submit(self.payload)
+        self.executor.drain(timeout=5)
+        self.assertEqual(mock.call_count, 2)
+        self.assertTrue(self.manager.is_confirmed(self.payload.TopicArn))
+
+    def test_queue_full(self, mock: MagicMock) -> None:
+        """Test a confirmation that can't be queued is released"""
+        self.manager.executor = BackgroundExecutor(max_workers=0, max_pending=0)
+        self.assertFalse(self.manager.submit(self.payload))
+        self.assertIsNone(cache.get(self.manager.make_key(self.payload)))
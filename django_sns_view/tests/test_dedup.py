@@ -0,0 +1,113 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from ..dedup import DjangoCacheDeduplicator, LocMemDeduplicator
+
+
+class LocMemDeduplicatorTest(SimpleTestCase):
+    def test_seen(self) -> None:
+        """Test a message id is only unseen the first time"""
+        dedup = LocMemDeduplicator()
+        self.assertFalse(dedup.seen("a"))
+        self.assertTrue(dedup.seen("a"))
+        self.assertFalse(dedup.seen("b"))
+
+    def test_forget(self) -> None:
+        """Test a forgotten message id is unseen again"""
+        dedup = LocMemDeduplicator()
+        dedup.seen("a")
+        dedup.forget("a")
+        self.assertFalse(dedup.seen("a"))
+
+    def test_max_size(self) -> None:
+        """Test the least recently seen ids are evicted first"""
+        dedup = LocMemDeduplicator(max_size=2)
+        dedup.seen("a")
+        dedup.seen("b")
+        dedup.seen("a")
+        dedup.seen("c")
+        self.assertTrue(dedup.seen("a"))
+        self.assertFalse(dedup.seen("b"))
+
+    @patch("django_sns_view.dedup.time.monotonic")
+    def test_ttl(self, monotonic: MagicMock) -> None:
+        """Test message ids expire after the ttl"""
+        dedup = LocMemDeduplicator(ttl=10)
+        monotonic.return_value = 100
+        dedup.seen("a")
+        dedup.finish("a")
+        monotonic.return_value = 109
+        self.assertTrue(dedup.seen("a"))
+        monotonic.return_value = 120
+        self.assertFalse(dedup.seen("a"))
+
+    def test_finished(self) -> None:
+        """Test a seen message id is in progress until finished"""
+        dedup = LocMemDeduplicator()
+        self.assertFalse(dedup.finished("a"))
+        dedup.seen("a")
+        self.assertFalse(dedup.finished("a"))
+        dedup.finish("a")
+        self.assertTrue(dedup.finished("a"))
+        self.assertTrue(dedup.seen("a"))
+
+    @patch("django_sns_view.dedup.time.monotonic")
+    def test_pending_ttl(self, monotonic: MagicMock) -> None:
+        """Test ids in progress expire after the pending_ttl"""
+        dedup = LocMemDeduplicator(ttl=100, pending_ttl=10)
+        monotonic.return_value = 100
+        dedup.seen("a")
+        monotonic.return_value = 109
+        self.assertTrue(dedup.seen("a"))
+        monotonic.return_value = 120
+        self.assertFalse(dedup.seen("a"))
+
+
+class DjangoCacheDeduplicatorTest(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_shared_between_processes(self) -> None:
+        """Test ids seen by one process are seen by another"""
+        self.assertFalse(DjangoCacheDeduplicator().seen("a"))
+        self.assertTrue(DjangoCacheDeduplicator().seen("a"))
+
+    def test_forget(self) -> None:
+        """Test forgetting removes the id from the shared cache"""
+        DjangoCacheDeduplicator().seen("a")
+        DjangoCacheDeduplicator().forget("a")
+        self.assertFalse(DjangoCacheDeduplicator().seen("a"))
+
+    def test_finished_shared_between_processes(self) -> None:
+        """Test whether an id was handled is shared between processes"""
+        first, second = DjangoCacheDeduplicator(), DjangoCacheDeduplicator()
+        first.seen("a")
+        self.assertTrue(second.seen("a"))
+        self.assertFalse(second.finished("a"))
+        first.finish("a")
+        self.assertTrue(second.finished("a"))
+
+    def test_failed_elsewhere_forgotten(self) -> None:
+        """Test an id another process forgot isn't held in progress here"""
+        first, second = DjangoCacheDeduplicator(), DjangoCacheDeduplicator()
+        first.seen("a")
+        self.assertTrue(second.seen("a"))
+        first.forget("a")
+        self.assertFalse(second.finished("a"))
+        self.assertFalse(second.seen("a"))
+
+    async def test_afinished(self) -> None:
+        """Test the async interface records finished ids in the cache"""
+        await DjangoCacheDeduplicator().aseen("a")
+        self.assertFalse(await DjangoCacheDeduplicator().afinished("a"))
+        await DjangoCacheDeduplicator().afinish("a")
+        self.assertTrue(await DjangoCacheDeduplicator().afinished("a"))
+
+    async def test_aseen(self) -> None:
+        """Test the async interface shares the same cache"""
+        self.assertFalse(await DjangoCacheDeduplicator().aseen("a"))
+        self.assertTrue(DjangoCacheDeduplicator().seen("a"))
+        await DjangoCacheDeduplicator().aforget("a")
+        self.assertFalse(await DjangoCacheDeduplicator().aseen("a"))
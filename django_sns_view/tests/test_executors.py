@@ -0,0 +1,49 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+import threading
+
+from ..executors import BackgroundExecutor
+
+
+class BackgroundExecutorTest(TestCase):
+    def setUp(self) -> None:
+        self.executor = BackgroundExecutor(max_workers=1, max_pending=1)
+        self.release = threading.Event()
+        self.addCleanup(self.executor.shutdown)
+        self.addCleanup(self.release.set)
+
+    def test_bounded_queue(self) -> None:
+        """Test submissions are refused once workers and queue are full"""
+        self.assertTrue(self.executor.submit(self.release.wait))
+        self.assertTrue(self.executor.submit(self.release.wait))
+        self.assertFalse(self.executor.submit(self.release.wait))
+        self.assertEqual(self.executor.pending, 2)
+
+        self.release.set()
+        self.assertTrue(self.executor.drain(timeout=5))
+        self.assertEqual(self.executor.pending, 0)
+        self.assertTrue(self.executor.submit(self.release.wait))
+
+    def test_drain_timeout(self) -> None:
+        """Test drain gives up when handlers don't finish in time"""
+        self.executor.submit(self.release.wait)
+        self.assertFalse(self.executor.drain(timeout=0.01))
+
+    def test_on_error_called(self) -> None:
+        """Test handler failures are reported to the error hook"""
+        on_error = MagicMock()
+        error = ValueError("boom")
+
+        def fail() -> None:
+            raise error
+
+        self.executor.submit(fail, on_error=on_error)
+        self.executor.drain(timeout=5)
+        on_error.assert_called_once_with(error)
+
+    def test_shutdown_drains(self) -> None:
+        """Test shutdown waits for queued handlers"""
+        handler = MagicMock()
+        self.executor.submit(handler, "message")
+        self.executor.shutdown()
+        handler.assert_called_once_with("message")
@@ -0,0 +1,102 @@
+from typing import Any
+from unittest import TestCase
+import json
+
+from ..filters import FilterPolicy
+from ..types import Notification
+from .test_data.notifications import SNS_NOTIFICATION
+
+
+def make_notification(
+    attributes: dict[str, Any] | None = None, body: Any = None
+) -> Notification:
+    return Notification.model_validate(
+        dict(
+            SNS_NOTIFICATION,
+            Message=json.dumps(body),
+            MessageAttributes={
+                key: {
+                    "Type": "Number" if isinstance(value, (int, float)) else "String",
+                    "Value": str(value),
+                }
+                for key, value in (attributes or {}).items()
+            },
+        )
+    )
+
+
+class AttributeFilterPolicyTest(TestCase):
+    def test_exact(self) -> None:
+        """Test exact strings and numbers, with any of a key's rules matching"""
+        policy = FilterPolicy({"store": ["example_corp", "other_corp"], "size": [5]})
+        self.assertTrue(
+            policy.matches(make_notification({"store": "other_corp", "size": 5}))
+        )
+        self.assertFalse(
+            policy.matches(make_notification({"store": "nope", "size": 5}))
+        )
+        self.assertFalse(policy.matches(make_notification({"store": "example_corp"})))
+
+    def test_prefix(self) -> None:
+        """Test values are matched by prefix"""
+        policy = FilterPolicy({"event": [{"prefix": "order-"}]})
+        self.assertTrue(policy.matches(make_notification({"event": "order-placed"})))
+        self.assertFalse(policy.matches(make_notification({"event": "refund"})))
+
+    def test_numeric_range(self) -> None:
+        """Test numeric ranges only match Number attributes"""
+        policy = FilterPolicy({"price": [{"numeric": [">", 0, "<=", 150]}]})
+        self.assertTrue(policy.matches(make_notification({"price": 150})))
+        self.assertFalse(policy.matches(make_notification({"price": 0})))
+        self.assertFalse(policy.matches(make_notification({"price": "150"})))
+
+    def test_anything_but(self) -> None:
+        """Test anything-but matches other values of present keys"""
+        policy = FilterPolicy({"event": [{"anything-but": ["cancelled", "refund"]}]})
+        self.assertTrue(policy.matches(make_notification({"event": "placed"})))
+        self.assertFalse(policy.matches(make_notification({"event": "refund"})))
+        self.assertFalse(policy.matches(make_notification()))
+
+    def test_exists(self) -> None:
+        """Test keys are matched by whether they are present"""
+        present = FilterPolicy({"event": [{"exists": True}]})
+        absent = FilterPolicy({"event": [{"exists": False}]})
+        notification = make_notification({"event": "placed"})
+        self.assertTrue(present.matches(notification))
+        self.assertFalse(absent.matches(notification))
+        self.assertTrue(absent.matches(make_notification()))
+
+    def test_invalid_policy(self) -> None:
+        """Test policies that can't be compiled are refused"""
+        with self.assertRaises(ValueError):
+            FilterPolicy({"event": "placed"})
+        with self.assertRaises(ValueError):
+            FilterPolicy({"event": [{"numeric": ["~", 1]}]})
+        with self.assertRaises(ValueError):
+            FilterPolicy({"event": {"nested": ["x"]}})
+
+
+class BodyFilterPolicyTest(TestCase):
+    def test_nested_keys(self) -> None:
+        """Test nested policies match nested keys of the JSON message"""
+        policy = FilterPolicy(
+            {"order": {"status": ["placed"], "total": [{"numeric": [">=", 100]}]}},
+            scope="MessageBody",
+        )
+        body = {"order": {"status": "placed", "total": 120}}
+        self.assertTrue(policy.matches(make_notification(body=body)))
+        body["order"]["total"] = 20
+        self.assertFalse(policy.matches(make_notification(body=body)))
+
+    def test_array_values(self) -> None:
+        """Test an array matches if any of its elements do"""
+        policy = FilterPolicy({"tags": ["urgent"]}, scope="MessageBody")
+        self.assertTrue(
+            policy.matches(make_notification(body={"tags": ["a", "urgent"]}))
+        )
+        self.assertFalse(policy.matches(make_notification(body={"tags": ["a"]})))
+
+    def test_message_not_json_object(self) -> None:
+        """Test messages that aren't JSON objects don't match"""
+        policy = FilterPolicy({"tags": [{"exists": False}]}, scope="MessageBody")
+        self.assertFalse(policy.matches(make_notification(body=["a"])))
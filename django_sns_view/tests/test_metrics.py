@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+from ..metrics import InMemoryMetrics
+
+
+class InMemoryMetricsTest(TestCase):
+    def test_counters(self) -> None:
+        """Test counters are aggregated per set of labels"""
+        metrics = InMemoryMetrics()
+        metrics.increment("rejections", reason="Bad Topic")
+        metrics.increment("rejections", reason="Bad Topic")
+        metrics.increment("rejections", reason="Invalid payload")
+        self.assertEqual(metrics.get_count("rejections", reason="Bad Topic"), 2)
+        self.assertEqual(metrics.get_count("rejections", reason="Invalid payload"), 1)
+        self.assertEqual(metrics.get_count("rejections"), 0)
+
+    def test_timer(self) -> None:
+        """Test timings are recorded even if the stage raises"""
+        metrics = InMemoryMetrics()
+        with metrics.timer("parse"):
+            pass
+        with self.assertRaises(ValueError), metrics.timer("parse"):
+            raise ValueError
+        count, total = metrics.timings["parse"]
+        self.assertEqual(count, 2)
+        self.assertGreaterEqual(total, 0)
+
+    def test_render_prometheus(self) -> None:
+        """Test the Prometheus text format"""
+        metrics = InMemoryMetrics()
+        metrics.timing("verify", 0.5)
+        metrics.increment("cert_cache_hits")
+        metrics.increment("rejections", reason='Bad "Topic"')
+        self.assertEqual(
+            metrics.render_prometheus(),
+            "# TYPE sns_stage_seconds summary\n"
+            'sns_stage_seconds_count{stage="verify"} 1\n'
+            'sns_stage_seconds_sum{stage="verify"} 0.5\n'
+            "# TYPE sns_cert_cache_hits_total counter\n"
+            "sns_cert_cache_hits_total 1\n"
+            "# TYPE sns_rejections_total counter\n"
+            'sns_rejections_total{reason="Bad \\"Topic\\""} 1\n',
+        )
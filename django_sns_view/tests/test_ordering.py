@@ -0,0 +1,77 @@
+from unittest import TestCase
+import threading
+import time
+
+from ..ordering import GroupDispatcher
+
+
+def group_of(item: tuple[str | None, int]) -> str | None:
+    return item[0]
+
+
+class GroupDispatcherTest(TestCase):
+    def setUp(self) -> None:
+        self.dispatcher = GroupDispatcher(max_workers=4)
+        self.addCleanup(self.dispatcher.shutdown)
+
+    def test_in_order_within_group(self) -> None:
+        """Test items of a group are processed one at a time, in order"""
+        items = [(group, i) for i in range(5) for group in ("a", "b", "c")]
+        seen: dict[str | None, list[int]] = {}
+        running: set[str | None] = set()
+        overlapped = []
+        lock = threading.Lock()
+
+        def process(item: tuple[str | None, int]) -> bool:
+            group, i = item
+            with lock:
+                if group in running:
+                    overlapped.append(item)
+                running.add(group)
+            time.sleep(0.001)
+            with lock:
+                running.discard(group)
+                seen.setdefault(group, []).append(i)
+            return True
+
+        results = self.dispatcher.map(process, items, group_of)
+        self.assertEqual(results, [True] * len(items))
+        self.assertEqual(overlapped, [])
+        self.assertEqual(seen, {group: list(range(5)) for group in "abc"})
+
+    def test_groups_in_parallel(self) -> None:
+        """Test different groups, and items without one, run at the same time"""
+        items = [("a", 0), ("b", 0), (None, 0), (None, 1)]
+        barrier = threading.Barrier(len(items), timeout=5)
+
+        def process(item: tuple[str | None, int]) -> bool:
+            barrier.wait()
+            return True
+
+        self.assertEqual(
+            self.dispatcher.map(process, items, group_of), [True] * len(items)
+        )
+
+    def test_failure_skips_rest_of_group(self) -> None:
+        """Test the items after a failed one in its group are skipped"""
+        items = [("a", 0), ("b", 0), ("a", 1), ("b", 1), ("a", 2)]
+        processed = []
+
+        def process(item: tuple[str | None, int]) -> bool:
+            processed.append(item)
+            return item != ("a", 1)
+
+        for dispatcher in (self.dispatcher, GroupDispatcher(max_workers=1)):
+            processed.clear()
+            results = dispatcher.map(process, items, group_of)
+            self.assertEqual(results, [True, True, False, True, False])
+            self.assertNotIn(("a", 2), processed)
+
+    def test_error_raised(self) -> None:
+        """Test errors raised while processing are raised by map"""
+
+        def process(item: tuple[str | None, int]) -> bool:
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            self.dispatcher.map(process, [("a", 0), ("b", 0)], group_of)
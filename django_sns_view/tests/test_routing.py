@@ -0,0 +1,55 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from ..routing import TopicRouter
+
+ORDERS = "arn:aws:sns:us-east-1:123456789012:orders"
+
+
+class TopicRouterTest(TestCase):
+    def setUp(self) -> None:
+        self.router = TopicRouter()
+
+    def test_exact_match(self) -> None:
+        """Test exact ARNs are routed to their handler and options"""
+        handler = MagicMock()
+        self.router.add(ORDERS, handler, priority="high")
+        route = self.router.match(ORDERS)
+        assert route is not None
+        self.assertIs(route.handler, handler)
+        self.assertEqual(route.options, {"priority": "high"})
+        self.assertIsNone(self.router.match(ORDERS + "-other"))
+
+    def test_wildcard_match(self) -> None:
+        """Test wildcards match within a single ARN segment"""
+        route = self.router.add("arn:aws:sns:*:123456789012:orders-*")
+        self.assertIs(
+            self.router.match("arn:aws:sns:eu-west-1:123456789012:orders-eu"), route
+        )
+        self.assertIsNone(self.router.match("arn:aws:sns:eu-west-1:999:orders-eu"))
+        self.assertNotIn("arn:aws:sns:a:b:123456789012:orders-eu", self.router)
+
+    def test_exact_match_preferred(self) -> None:
+        """Test exact ARNs win over wildcards, which are tried in order"""
+        first = self.router.add("arn:aws:sns:*:123456789012:*")
+        self.router.add("arn:aws:sns:us-east-1:*:*")
+        exact = self.router.add(ORDERS)
+        self.assertIs(self.router.match(ORDERS), exact)
+        self.assertIs(self.router.match(ORDERS + "-eu"), first)
+
+    def test_route_decorator(self) -> None:
+        """Test the decorator adds the function as the route's handler"""
+
+        @self.router.route(ORDERS)
+        def handle_order(message: str, notification: object) -> None:
+            pass
+
+        route = self.router.match(ORDERS)
+        assert route is not None
+        self.assertIs(route.handler, handle_order)
+
+    def test_cache_cleared_on_add(self) -> None:
+        """Test a remembered miss doesn't hide a route added later"""
+        self.assertIsNone(self.router.match(ORDERS))
+        route = self.router.add("arn:aws:sns:*:*:orders")
+        self.assertIs(self.router.match(ORDERS), route)
@@ -0,0 +1,126 @@
+from io import StringIO
+from unittest.mock import AsyncMock, MagicMock, patch
+import os
+import tempfile
+import uuid
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+from ..spool import FileSpool
+from ..types import Notification
+from ..views import AsyncSNSEndpoint, SNSEndpoint
+from .test_data.notifications import SNS_NOTIFICATION
+
+
+def make_notification() -> Notification:
+    return Notification.model_validate(
+        dict(SNS_NOTIFICATION, MessageId=str(uuid.uuid4()))
+    )
+
+
+class SpoolEndpoint(SNSEndpoint):
+    pass
+
+
+class AsyncSpoolEndpoint(AsyncSNSEndpoint):
+    pass
+
+
+class FileSpoolTest(SimpleTestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.spool = FileSpool(
+            os.path.join(directory.name, "sns.jsonl"), max_attempts=3
+        )
+
+    def test_replay(self) -> None:
+        """Test spooled notifications are replayed in batches and removed"""
+        notifications = [make_notification() for _ in range(5)]
+        for notification in notifications:
+            self.spool.append(notification, ValueError("boom"))
+        self.assertEqual(len(self.spool), 5)
+
+        batches: list[list[Notification]] = []
+        self.assertEqual(self.spool.replay(batches.append, batch_size=2), (5, 0))
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(sum(batches, []), notifications)
+        self.assertEqual(len(self.spool), 0)
+
+    def test_failures_spooled_again(self) -> None:
+        """Test failed notifications are kept, until max_attempts is reached"""
+        ok, bad = make_notification(), make_notification()
+        self.spool.append(ok, "boom")
+        self.spool.append(bad, "boom")
+
+        self.assertEqual(self.spool.replay(lambda batch: [bad.MessageId]), (1, 1))
+        self.assertEqual(
+            [r.notification for r in self.spool.read(self.spool.path)], [bad]
+        )
+
+        def fail(batch: list[Notification]) -> None:
+            raise ValueError("boom")
+
+        self.assertEqual(self.spool.replay(fail), (0, 1))
+        self.assertEqual(len(self.spool), 0)
+        (dead,) = self.spool.read(self.spool.dead_path)
+        self.assertEqual(dead.notification, bad)
+        self.assertEqual(dead.attempts, 3)
+        self.assertEqual(dead.error, "ValueError: boom")
+
+    def test_interrupted_replay_kept(self) -> None:
+        """Test notifications that weren't replayed are put back"""
+        for _ in range(3):
+            self.spool.append(make_notification(), "boom")
+
+        def interrupt(batch: list[Notification]) -> None:
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.spool.replay(interrupt, batch_size=1)
+        self.assertEqual(len(self.spool), 3)
+
+    def test_replay_command(self) -> None:
+        """Test the management command replays through the view's handler"""
+        notification = make_notification()
+        self.spool.append(notification, "boom")
+        handler = MagicMock()
+        with (
+            patch.object(SpoolEndpoint, "spool", self.spool),
+            patch.object(SpoolEndpoint, "handle_message", handler),
+        ):
+            out = StringIO()
+            call_command(
+                "sns_replay_spool",
+                "django_sns_view.tests.test_spool.SpoolEndpoint",
+                stdout=out,
+            )
+        handler.assert_called_once_with(notification.Message, notification)
+        self.assertIn("Replayed 1 notifications, 0 failed", out.getvalue())
+
+    def test_replay_command_async(self) -> None:
+        """Test the management command awaits the handler of async views"""
+        notification = make_notification()
+        self.spool.append(notification, "boom")
+        handler = AsyncMock()
+        with (
+            patch.object(AsyncSpoolEndpoint, "spool", self.spool),
+            patch.object(AsyncSpoolEndpoint, "handle_message", handler),
+        ):
+            out = StringIO()
+            call_command(
+                "sns_replay_spool",
+                "django_sns_view.tests.test_spool.AsyncSpoolEndpoint",
+                stdout=out,
+            )
+        handler.assert_awaited_once_with(notification.Message, notification)
+        self.assertIn("Replayed 1 notifications, 0 failed", out.getvalue())
+        self.assertEqual(len(self.spool), 0)
+
+    def test_replay_command_without_spool(self) -> None:
+        """Test the management command needs a view with a spool"""
+        with self.assertRaises(CommandError):
+            call_command(
+                "sns_replay_spool", "django_sns_view.tests.test_spool.SpoolEndpoint"
+            )
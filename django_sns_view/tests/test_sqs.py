@@ -0,0 +1,276 @@
+from io import StringIO
+from typing import Any
+from unittest.mock import MagicMock, patch
+import json
+import sys
+import time
+import uuid
+
+from cryptography import x509
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from requests.exceptions import HTTPError
+
+from ..admission import AdmissionController
+from ..batching import MessageBatcher
+from ..dedup import LocMemDeduplicator
+from ..executors import BackgroundExecutor
+from ..sqs import SQSConsumer
+from ..types import Notification
+from ..views import SNSEndpoint
+from .helpers import make_certificate, sign_payload
+from .test_data.notifications import SNS_NOTIFICATION
+
+QUEUE_URL = "https://sqs.ap-southeast-2.amazonaws.com/919599206538/test-example"
+FIFO_QUEUE_URL = QUEUE_URL + ".fifo"
+
+
+class FakeSQSClient:
+    """
+    An in memory stand-in for the SQS API used by SQSConsumer. Received
+    messages stay in flight until deleted or made visible again by expire.
+    """
+
+    def __init__(self, queue_url: str = QUEUE_URL) -> None:
+        self.queue_url = queue_url
+        self.messages: dict[str, dict[str, Any]] = {}
+        self.in_flight: set[str] = set()
+        self.options: dict[str, Any] = {}
+
+    def send(self, body: str, group: str | None = None) -> str:
+        receipt_handle = uuid.uuid4().hex
+        self.messages[receipt_handle] = {
+            "MessageId": str(uuid.uuid4()),
+            "ReceiptHandle": receipt_handle,
+            "Body": body,
+        }
+        if group is not None:
+            self.messages[receipt_handle]["Attributes"] = {"MessageGroupId": group}
+        return receipt_handle
+
+    def expire(self) -> None:
+        self.in_flight.clear()
+
+    def receive_message(
+        self, QueueUrl: str, MaxNumberOfMessages: int, **options: Any
+    ) -> dict[str, Any]:
+        assert QueueUrl == self.queue_url
+        self.options = options
+        messages = [
+            message
+            for receipt_handle, message in self.messages.items()
+            if receipt_handle not in self.in_flight
+        ][:MaxNumberOfMessages]
+        self.in_flight.update(message["ReceiptHandle"] for message in messages)
+        return {"Messages": messages}
+
+    def delete_message_batch(
+        self, QueueUrl: str, Entries: list[dict[str, str]]
+    ) -> dict[str, Any]:
+        assert QueueUrl == self.queue_url
+        assert len(Entries) <= 10
+        for entry in Entries:
+            del self.messages[entry["ReceiptHandle"]]
+            self.in_flight.discard(entry["ReceiptHandle"])
+        return {"Successful": [{"Id": entry["Id"]} for entry in Entries]}
+
+
+class SQSEndpoint(SNSEndpoint):
+    pass
+
+
+@patch("django_sns_view.utils.get_x509_cert")
+class SQSConsumerTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.key, pem = make_certificate()
+        self.cert = x509.load_pem_x509_certificate(pem)
+        self.queue = FakeSQSClient()
+
+    def send(self, group: str | None = None, **changes: Any) -> dict[str, Any]:
+        payload = sign_payload(
+            dict(SNS_NOTIFICATION, MessageId=str(uuid.uuid4())), self.key
+        )
+        if group is not None:
+            payload["MessageGroupId"] = group
+        payload.update(changes)
+        self.queue.send(json.dumps(payload), group)
+        return payload
+
+    def consumer(self, **options: Any) -> SQSConsumer:
+        return SQSConsumer(
+            SQSEndpoint, self.queue.queue_url, client=self.queue, **options
+        )
+
+    def test_handled_messages_deleted(self, get_cert: MagicMock) -> None:
+        """Test verified notifications are handled and deleted"""
+        get_cert.return_value = self.cert
+        payloads = [self.send() for _ in range(12)]
+        with patch.object(SQSEndpoint, "handle_message") as handler:
+            self.assertEqual(self.consumer().poll(), (10, 0))
+            self.assertEqual(self.consumer().poll(), (2, 0))
+        self.assertEqual(self.queue.messages, {})
+        self.assertEqual(
+            [call.args[1].MessageId for call in handler.call_args_list],
+            [uuid.UUID(payload["MessageId"]) for payload in payloads],
+        )
+
+    def test_rejected_messages_left(self, get_cert: MagicMock) -> None:
+        """Test messages failing verification are left unless deleting them"""
+        get_cert.return_value = self.cert
+        self.send(Message="tampered")
+        with patch.object(SQSEndpoint, "handle_message") as handler:
+            self.assertEqual(self.consumer().poll(), (0, 1))
+            self.queue.expire()
+            self.assertEqual(self.consumer(delete_rejected=True).poll(), (1, 0))
+        handler.assert_not_called()
+
+    def test_verification_error_left(self, get_cert: MagicMock) -> None:
+        """Test a message whose certificate can't be fetched doesn't stop the batch"""
+        get_cert.side_effect = [self.cert, HTTPError("503 Server Error")]
+        self.send()
+        bad = self.send(SigningCertURL="https://sns.us-east-1.amazonaws.com/other.pem")
+        with patch.object(SQSEndpoint, "handle_message") as handler:
+            self.assertEqual(self.consumer().poll(), (1, 1))
+        handler.assert_called_once()
+        (left,) = self.queue.messages.values()
+        self.assertEqual(json.loads(left["Body"])["MessageId"], bad["MessageId"])
+
+    def test_failed_messages_left(self, get_cert: MagicMock) -> None:
+        """Test messages whose handler failed become visible again"""
+        get_cert.return_value = self.cert
+        self.send()
+        with patch.object(SQSEndpoint, "handle_message", side_effect=ValueError):
+            self.assertEqual(self.consumer().poll(), (0, 1))
+        self.assertEqual(self.consumer().poll(), (0, 0))
+        self.queue.expire()
+        with patch.object(SQSEndpoint, "handle_message"):
+            self.assertEqual(self.consumer().poll(), (1, 0))
+
+    def test_executor_not_used(self, get_cert: MagicMock) -> None:
+        """Test messages are only deleted once their handler ran, not queued"""
+        get_cert.return_value = self.cert
+        self.send()
+        self.send()
+        executor = BackgroundExecutor()
+        self.addCleanup(executor.shutdown)
+        with (
+            patch.object(SQSEndpoint, "executor", executor),
+            patch.object(SQSEndpoint, "handle_message", side_effect=[ValueError, None]),
+        ):
+            self.assertEqual(self.consumer().poll(), (1, 1))
+        self.assertEqual(executor.pending, 0)
+
+    def test_overloaded_messages_left(self, get_cert: MagicMock) -> None:
+        """Test messages refused by the admission controller are left"""
+        get_cert.return_value = self.cert
+        self.send()
+        admission = AdmissionController(max_concurrent=0)
+        with (
+            patch.object(SQSEndpoint, "admission", admission),
+            patch.object(SQSEndpoint, "handle_message") as handler,
+        ):
+            self.assertEqual(self.consumer().poll(), (0, 1))
+        handler.assert_not_called()
+
+    def test_batched(self, get_cert: MagicMock) -> None:
+        """Test concurrently handled messages reach handle_messages together"""
+        get_cert.return_value = self.cert
+        for _ in range(4):
+            self.send()
+        batcher = MessageBatcher(max_size=4, max_wait=5)
+        batches: list[list[Notification]] = []
+        with (
+            patch.object(SQSEndpoint, "batcher", batcher),
+            patch.object(SQSEndpoint, "handle_messages", side_effect=batches.append),
+        ):
+            self.assertEqual(self.consumer(concurrency=4).run(max_polls=1), (4, 0))
+        self.assertEqual([len(batch) for batch in batches], [4])
+
+    def test_fifo_order(self, get_cert: MagicMock) -> None:
+        """Test a failure leaves the rest of its message group on the queue"""
+        get_cert.return_value = self.cert
+        self.queue = FakeSQSClient(FIFO_QUEUE_URL)
+        sent = [self.send(group=group) for _ in range(3) for group in ("a", "b")]
+        failing = uuid.UUID(sent[2]["MessageId"])
+        handled: list[Notification] = []
+
+        def handle(message: str, notification: Notification) -> None:
+            if notification.MessageId == failing:
+                raise ValueError("boom")
+            handled.append(notification)
+
+        with patch.object(SQSEndpoint, "handle_message", side_effect=handle):
+            self.assertEqual(self.consumer(concurrency=2).poll(), (4, 2))
+        self.assertEqual(
+            self.queue.options["MessageSystemAttributeNames"], ["MessageGroupId"]
+        )
+        self.assertEqual(
+            [
+                (n.MessageGroupId, str(n.MessageId))
+                for n in handled
+                if n.MessageGroupId == "a"
+            ],
+            [("a", sent[0]["MessageId"])],
+        )
+        self.assertEqual(
+            [str(n.MessageId) for n in handled if n.MessageGroupId == "b"],
+            [sent[i]["MessageId"] for i in (1, 3, 5)],
+        )
+
+    def test_fifo_order_with_executor(self, get_cert: MagicMock) -> None:
+        """Test a view's executor doesn't let a group's messages overtake"""
+        get_cert.return_value = self.cert
+        self.queue = FakeSQSClient(FIFO_QUEUE_URL)
+        first, second = self.send(group="a"), self.send(group="a")
+        handled: list[str] = []
+
+        def handle(message: str, notification: Notification) -> None:
+            if str(notification.MessageId) == first["MessageId"]:
+                time.sleep(0.05)
+            handled.append(str(notification.MessageId))
+
+        executor = BackgroundExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        with (
+            patch.object(SQSEndpoint, "executor", executor),
+            patch.object(SQSEndpoint, "handle_message", side_effect=handle),
+        ):
+            self.assertEqual(self.consumer(concurrency=2).poll(), (2, 0))
+        self.assertEqual(handled, [first["MessageId"], second["MessageId"]])
+
+    def test_fifo_deduplication_id(self, get_cert: MagicMock) -> None:
+        """Test queued FIFO messages are deduplicated by MessageDeduplicationId"""
+        get_cert.return_value = self.cert
+        self.queue = FakeSQSClient(FIFO_QUEUE_URL)
+        for _ in range(2):
+            self.send(group="a", MessageDeduplicationId="order-1")
+        with (
+            patch.object(SQSEndpoint, "deduplicator", LocMemDeduplicator()),
+            patch.object(SQSEndpoint, "handle_message") as handler,
+        ):
+            self.assertEqual(self.consumer().poll(), (2, 0))
+        handler.assert_called_once()
+
+    def test_command(self, get_cert: MagicMock) -> None:
+        """Test the management command consumes the queue"""
+        get_cert.return_value = self.cert
+        self.send()
+        out = StringIO()
+        with patch.object(SQSEndpoint, "handle_message") as handler:
+            call_command(
+                "sns_consume_sqs",
+                "django_sns_view.tests.test_sqs.SQSEndpoint",
+                QUEUE_URL,
+                "--max-polls=1",
+                client=self.queue,
+                stdout=out,
+            )
+        handler.assert_called_once()
+        self.assertIn("Handled 1 messages, 0 left on the queue", out.getvalue())
+
+    def test_boto3_required(self, get_cert: MagicMock) -> None:
+        """Test a client can't be created without boto3"""
+        with patch.dict(sys.modules, {"boto3": None}):
+            with self.assertRaises(ImproperlyConfigured):
+                SQSConsumer(SQSEndpoint, QUEUE_URL).get_client()
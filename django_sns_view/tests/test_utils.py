@@ -1,16 +1,44 @@
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+import os
+import subprocess
+import sys
 
 from cryptography import x509
+from django.apps import apps
 from django.conf import settings
+from django.test import override_settings
 from requests.exceptions import HTTPError
 import pydantic
 
-from ..utils import confirm_subscription, get_x509_cert, verify_notification
-from .helpers import SNSBaseTest
+from .. import certs, client
+from ..certs import get_cert_store
+from ..metrics import InMemoryMetrics
+from ..types import AnySNSPayload, Notification
+from ..utils import (
+    NOTIFICATION_HASH_FORMAT,
+    NOTIFICATION_HASH_FORMAT_NO_SUBJECT,
+    SUBSCRIPTION_HASH_FORMAT,
+    VerifiedSignatureCache,
+    aconfirm_subscription,
+    aget_x509_cert,
+    averify_notification,
+    build_signing_string,
+    confirm_subscription,
+    get_x509_cert,
+    verified_signatures,
+    verify_notification,
+    warmup,
+)
+from .helpers import SNSBaseTest, make_certificate, sign_payload
+from .test_data.notifications import SNS_NOTIFICATION
 
 
 class VerificationTest(SNSBaseTest):
-    @patch("django_sns_view.utils.requests.get")
+    def setUp(self) -> None:
+        get_cert_store().clear()
+        verified_signatures.clear()
+
+    @patch("django_sns_view.client.HTTPClient.get")
     def test_get_x509_cert(self, mock: MagicMock) -> None:
         """Test the get_pemfile util"""
         responsemock = Mock()
@@ -21,7 +49,18 @@ class VerificationTest(SNSBaseTest):
         mock.assert_called_with("http://www.fakeurl.com")
         self.assertIsInstance(result, x509.Certificate)
 
-    @patch("django_sns_view.utils.requests.get")
+    @patch("django_sns_view.client.HTTPClient.get")
+    def test_get_x509_cert_metrics(self, mock: MagicMock) -> None:
+        """Test certificate cache hits and misses are counted"""
+        _, pem = make_certificate()
+        mock.return_value = Mock(text=pem.decode())
+        metrics = InMemoryMetrics()
+        get_x509_cert("http://www.fakeurl.com/metrics.pem", metrics)
+        get_x509_cert("http://www.fakeurl.com/metrics.pem", metrics)
+        self.assertEqual(metrics.get_count("cert_cache_misses"), 1)
+        self.assertEqual(metrics.get_count("cert_cache_hits"), 1)
+
+    @patch("django_sns_view.client.HTTPClient.get")
     def test_bad_keyfile(self, mock: MagicMock) -> None:
         """Test a non-valid keyfile"""
         responsemock = Mock()
@@ -48,9 +87,82 @@ class VerificationTest(SNSBaseTest):
         result = verify_notification(self.sns_notification_no_subject)
         self.assertTrue(result)
 
+    @patch("django_sns_view.utils.get_x509_cert")
+    def test_verify_signature_version_2(self, mock: MagicMock) -> None:
+        """Test the verification of a SignatureVersion 2 (SHA256) notification"""
+        key, pem = make_certificate()
+        mock.return_value = x509.load_pem_x509_certificate(pem)
+        signed = sign_payload(SNS_NOTIFICATION, key, signature_version="2")
+        self.assertTrue(verify_notification(Notification.model_validate(signed)))
+
+        tampered = Notification.model_validate(dict(signed, Message="tampered"))
+        self.assertFalse(verify_notification(tampered))
+
+    def test_build_signing_string(self) -> None:
+        """Test the signing string matches the hash format templates"""
+        cases: list[tuple[AnySNSPayload, str]] = [
+            (self.sns_notification, NOTIFICATION_HASH_FORMAT),
+            (self.sns_notification_no_subject, NOTIFICATION_HASH_FORMAT_NO_SUBJECT),
+            (self.sns_confirmation, SUBSCRIPTION_HASH_FORMAT),
+            (self.sns_unsubscribe, SUBSCRIPTION_HASH_FORMAT),
+        ]
+        for payload, hash_format in cases:
+            with self.subTest(payload.Type):
+                self.assertEqual(
+                    build_signing_string(payload),
+                    hash_format.format(**payload.model_dump()).encode("utf-8"),
+                )
+
+    @patch("django_sns_view.utils.get_x509_cert")
+    def test_verified_signature_cached(self, mock: MagicMock) -> None:
+        """Test a redelivered message skips the public key operation"""
+        mock.return_value = self.x509_cert
+        metrics = InMemoryMetrics()
+        self.assertTrue(verify_notification(self.sns_notification, metrics))
+        self.assertTrue(verify_notification(self.sns_notification, metrics))
+        self.assertEqual(metrics.get_count("signature_cache_hits"), 1)
+
+    @override_settings(SNS_VERIFIED_SIGNATURE_CACHE_SIZE=0)
+    @patch("django_sns_view.utils.get_x509_cert")
+    def test_verified_signature_cache_disabled(self, mock: MagicMock) -> None:
+        """Test the verified signature cache can be disabled"""
+        mock.return_value = self.x509_cert
+        metrics = InMemoryMetrics()
+        verify_notification(self.sns_notification, metrics)
+        verify_notification(self.sns_notification, metrics)
+        self.assertEqual(metrics.get_count("signature_cache_hits"), 0)
+
+    def test_verified_signature_cache_eviction(self) -> None:
+        """Test the least recently used signatures are evicted"""
+        cache = VerifiedSignatureCache(max_size=2)
+        cache.add(("url", b"a", b""))
+        cache.add(("url", b"b", b""))
+        self.assertTrue(cache.check(("url", b"a", b"")))
+        cache.add(("url", b"c", b""))
+        self.assertTrue(cache.check(("url", b"a", b"")))
+        self.assertFalse(cache.check(("url", b"b", b"")))
+
+    @patch("django_sns_view.client.HTTPClient.aget", new_callable=AsyncMock)
+    async def test_aget_x509_cert(self, mock: AsyncMock) -> None:
+        """Test the async certificate fetch and its cache"""
+        _, mock.return_value = make_certificate()
+        result = await aget_x509_cert("http://www.fakeurl.com/async.pem")
+        cached = await aget_x509_cert("http://www.fakeurl.com/async.pem")
+
+        mock.assert_awaited_once_with("http://www.fakeurl.com/async.pem")
+        self.assertIsInstance(result, x509.Certificate)
+        self.assertIs(result, cached)
+
+    @patch("django_sns_view.utils.aget_x509_cert", new_callable=AsyncMock)
+    async def test_averify_notification(self, mock: AsyncMock) -> None:
+        """Test the async verification of a valid notification"""
+        mock.return_value = self.x509_cert
+        result = await averify_notification(self.sns_notification)
+        self.assertTrue(result)
+
 
 class ConfirmSubscriptionTest(SNSBaseTest):
-    @patch("django_sns_view.utils.requests.get")
+    @patch("django_sns_view.client.HTTPClient.get")
     def test_successful_confirm_subscription(self, mock: MagicMock) -> None:
         """Test a successful subscription confirmation"""
         mock_resp = Mock()
@@ -65,14 +177,10 @@ class ConfirmSubscriptionTest(SNSBaseTest):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.content.decode("ascii"), "OK")
 
-    @patch("django_sns_view.utils.requests.get")
+    @patch("django_sns_view.client.HTTPClient.get")
     def test_fail_confirm_subscription(self, mock: MagicMock) -> None:
         """Test a successful subscription confirmation"""
-        mock_resp = Mock()
-        mock_resp.raise_for_status = Mock()
-        mock_resp.raise_for_status.side_effect = HTTPError("site is down")
-        mock_resp.status_code = 503
-        mock.return_value = mock_resp
+        mock.side_effect = HTTPError("site is down")
 
         self.assertRaises(HTTPError, confirm_subscription, self.sns_confirmation)
         mock.assert_called_with(str(self.sns_confirmation.SubscribeURL))
@@ -90,3 +198,81 @@ class ConfirmSubscriptionTest(SNSBaseTest):
 
         if old_setting is not None:
             settings.SNS_SUBSCRIBE_DOMAIN_REGEX = old_setting
+
+    @patch("django_sns_view.client.HTTPClient.aget", new_callable=AsyncMock)
+    async def test_successful_aconfirm_subscription(self, mock: AsyncMock) -> None:
+        """Test a successful async subscription confirmation"""
+        response = await aconfirm_subscription(self.sns_confirmation)
+
+        mock.assert_awaited_once_with(str(self.sns_confirmation.SubscribeURL))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode("ascii"), "OK")
+
+    @patch("django_sns_view.client.HTTPClient.aget", new_callable=AsyncMock)
+    async def test_fail_aconfirm_subscription(self, mock: AsyncMock) -> None:
+        """Test a failed async subscription confirmation"""
+        mock.side_effect = HTTPError("site is down")
+        with self.assertRaises(HTTPError):
+            await aconfirm_subscription(self.sns_confirmation)
+
+
+class LazyImportTest(SNSBaseTest):
+    def test_views_import_lazily(self) -> None:
+        """Test importing the views doesn't import the verification dependencies"""
+        code = (
+            "import sys, django; django.setup(); "
+            "import django_sns_view.views; "
+            "print(' '.join(sorted({m.split('.')[0] for m in sys.modules})))"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE="django_sns_view.tests.settings",
+            PYTHONPATH=root,
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=root,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        loaded = set(output.split())
+        self.assertIn("django_sns_view", loaded)
+        for name in ("pydantic", "pydantic_core", "requests", "cryptography"):
+            self.assertNotIn(name, loaded)
+
+    def test_views_import_without_fcntl(self) -> None:
+        """Test the views can be imported where fcntl isn't available"""
+        code = (
+            "import sys; sys.modules['fcntl'] = None; "
+            "import django; django.setup(); "
+            "import django_sns_view.views, django_sns_view.spool"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE="django_sns_view.tests.settings",
+            PYTHONPATH=root,
+        )
+        subprocess.run([sys.executable, "-c", code], cwd=root, env=env, check=True)
+
+    def test_warmup(self) -> None:
+        """Test warmup sets up the certificate store and HTTP client"""
+        with override_settings(SNS_CERT_STORE=certs.DEFAULT_CERT_STORE):
+            warmup()
+            self.assertIsNotNone(certs._cert_store)
+            self.assertIsNotNone(client._http_client)
+            self.assertIsNotNone(client.get_http_client()._session)
+        self.assertIn("cryptography.hazmat.primitives.asymmetric.padding", sys.modules)
+
+    @patch("django_sns_view.utils.warmup")
+    def test_ready_warms_up(self, mock: MagicMock) -> None:
+        """Test the app warms up when SNS_WARMUP is set"""
+        config = apps.get_app_config("django_sns_view")
+        config.ready()
+        mock.assert_not_called()
+        with override_settings(SNS_WARMUP=True):
+            config.ready()
+        mock.assert_called_once_with()
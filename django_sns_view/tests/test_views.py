@@ -1,18 +1,57 @@
+from collections.abc import Awaitable, Callable
 from copy import deepcopy
-from unittest.mock import MagicMock, patch
+from typing import Annotated, Literal, cast
+from unittest.mock import AsyncMock, MagicMock, patch
+import base64
 import json
+import os
+import tempfile
+import threading
 
 from django.conf import settings
-from django.http import HttpResponse, HttpResponseNotAllowed
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBase,
+    HttpResponseNotAllowed,
+)
 from django.test import RequestFactory
 from django.test.utils import override_settings
+import pydantic
 
+from ..admission import AdmissionController
+from ..batching import MessageBatcher
+from ..confirmations import ConfirmationManager
+from ..decoders import LeanDecoder, LeanNotification
+from ..dedup import LocMemDeduplicator
+from ..executors import BackgroundExecutor
+from ..filters import FilterPolicy
+from ..metrics import InMemoryMetrics
+from ..routing import TopicRouter
+from ..spool import FileSpool
 from ..types import Notification
-from ..views import SNSEndpoint
+from ..views import AsyncSNSEndpoint, SNSEndpoint
 from .helpers import SNSBaseTest
 from .test_data.notifications import SNS_NOTIFICATION
 
 
+class Greeting(pydantic.BaseModel):
+    hello: str
+
+
+class Order(pydantic.BaseModel):
+    kind: Literal["order"]
+    id: int
+
+
+class Refund(pydantic.BaseModel):
+    kind: Literal["refund"]
+    id: int
+
+
+Event = Annotated[Order | Refund, pydantic.Field(discriminator="kind")]
+
+
 @override_settings(SNS_VERIFY_CERTIFICATE=False)
 class SNSEndpointTestCase(SNSBaseTest):
     def setUp(self) -> None:
@@ -74,6 +113,49 @@ class SNSEndpointTestCase(SNSBaseTest):
             "Bad Topic",
         )
 
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_disallowed_message_type(self, mock: MagicMock) -> None:
+        """Test message types that aren't allowed are rejected unread"""
+        self.request._body = b"This Is Not JSON"
+        endpoint = SNSEndpoint.as_view(allowed_message_types=["Notification"])
+        self.request.META["HTTP_X_AMZ_SNS_MESSAGE_TYPE"] = "SubscriptionConfirmation"
+        response = cast(HttpResponse, endpoint(self.request))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.content.decode("ascii"), "Bad Message Type")
+        mock.assert_not_called()
+
+    def test_message_type_mismatch(self) -> None:
+        """Test a payload whose Type doesn't match the header is rejected"""
+        self.request._body = self.sns_confirmation.model_dump_json().encode()
+        response = cast(HttpResponse, self.endpoint(self.request))
+        self.assertEqual(response.content.decode("ascii"), "Bad Message Type")
+
+    def test_topic_mismatch(self) -> None:
+        """Test a payload whose TopicArn doesn't match the header is rejected"""
+        self.request.META["HTTP_X_AMZ_SNS_TOPIC_ARN"] = "arn:aws:sns:other"
+        self.request._body = self.sns_notification.model_dump_json().encode()
+        response = cast(HttpResponse, self.endpoint(self.request))
+        self.assertEqual(response.content.decode("ascii"), "TopicArn Mismatch")
+
+    def test_content_length_too_large(self) -> None:
+        """Test requests over max_content_length are rejected unread"""
+        request = self.factory.post("/", b"x" * 2048, content_type="application/json")
+        response = cast(
+            HttpResponse, SNSEndpoint.as_view(max_content_length=1024)(request)
+        )
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(hasattr(request, "_body"))
+
+    def test_content_length_required(self) -> None:
+        """Test requests without a Content-Length are rejected unread"""
+        request = self.factory.post("/", b"x" * 2048, content_type="application/json")
+        del request.META["CONTENT_LENGTH"]
+        response = cast(
+            HttpResponse, SNSEndpoint.as_view(max_content_length=1024)(request)
+        )
+        self.assertEqual(response.status_code, 411)
+        self.assertFalse(hasattr(request, "_body"))
+
     def test_invalid_notification_json(self) -> None:
         """Test if the notification does not have a JSON body"""
         self.request._body = b"This Is Not JSON"
@@ -109,6 +191,22 @@ class SNSEndpointTestCase(SNSBaseTest):
         self.assertTrue(mock.called)
         self.assertEqual(response, "Confirmed")
 
+    @patch("django_sns_view.views.confirm_subscription")
+    def test_confirmation_manager(self, mock: MagicMock) -> None:
+        """Test confirmations are acknowledged and handed to the manager"""
+        manager = MagicMock(spec=ConfirmationManager)
+        manager.submit.return_value = True
+        self.request.META["HTTP_X_AMZ_SNS_MESSAGE_TYPE"] = "SubscriptionConfirmation"
+        self.request._body = self.sns_confirmation.model_dump_json().encode()
+        endpoint = SNSEndpoint.as_view(confirmation_manager=manager)
+        response = endpoint(self.request)
+        self.assertEqual(response.status_code, 200)
+        manager.submit.assert_called_once_with(self.sns_confirmation)
+        mock.assert_not_called()
+
+        manager.submit.return_value = False
+        self.assertEqual(endpoint(self.request).status_code, 503)
+
     def test_unsubscribe_confirmation_not_handled(self) -> None:
         """Test that an unsubscribe notification is properly ignored"""
         self.request.META["HTTP_X_AMZ_SNS_MESSAGE_TYPE"] = "UnsubscribeConfirmation"
@@ -134,3 +232,589 @@ class SNSEndpointTestCase(SNSBaseTest):
             Notification.model_validate(SNS_NOTIFICATION),
         )
         self.assertEqual(response.status_code, 200)
+
+    @patch("django_sns_view.utils.get_x509_cert")
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_lean_decoder(self, mock: MagicMock, get_cert: MagicMock) -> None:
+        """Test notifications decoded by LeanDecoder are verified and handled"""
+        get_cert.return_value = self.x509_cert
+        self.request._body = json.dumps(SNS_NOTIFICATION).encode()
+        endpoint = SNSEndpoint.as_view(decoder=LeanDecoder())
+        with override_settings(SNS_VERIFY_CERTIFICATE=True):
+            response = endpoint(self.request)
+        self.assertEqual(response.status_code, 200)
+        message, notification = mock.call_args.args
+        self.assertEqual(message, SNS_NOTIFICATION["Message"])
+        self.assertIsInstance(notification, LeanNotification)
+
+
+class SNSEndpointMetricsTestCase(SNSBaseTest):
+    def setUp(self) -> None:
+        self.metrics = InMemoryMetrics()
+        self.endpoint = SNSEndpoint.as_view(metrics=self.metrics)
+
+    def _post(self, body: bytes) -> HttpResponse:
+        request = RequestFactory().post("/")
+        request._body = body
+        return cast(HttpResponse, self.endpoint(request))
+
+    @patch("django_sns_view.utils.get_x509_cert")
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_stage_timings(self, mock: MagicMock, get_cert: MagicMock) -> None:
+        """Test each stage of a handled notification is timed"""
+        get_cert.return_value = self.x509_cert
+        self._post(self.sns_notification.model_dump_json().encode())
+        self.assertEqual(
+            set(self.metrics.timings),
+            {"parse", "domain_check", "cert_fetch", "verify", "handler"},
+        )
+        self.assertEqual(self.metrics.get_count("messages", type="Notification"), 1)
+
+    def test_rejection_counted(self) -> None:
+        """Test rejections are counted by reason"""
+        self._post(b"This Is Not JSON")
+        self.assertEqual(
+            self.metrics.get_count("rejections", reason="Invalid payload"), 1
+        )
+
+
+@override_settings(SNS_VERIFY_CERTIFICATE=False)
+class SNSEndpointDeduplicationTestCase(SNSBaseTest):
+    def setUp(self) -> None:
+        self.endpoint = SNSEndpoint.as_view(deduplicator=LocMemDeduplicator())
+
+    def _post(self, notification: Notification | None = None) -> HttpResponse:
+        request = RequestFactory().post("/")
+        notification = notification or self.sns_notification
+        request._body = notification.model_dump_json().encode()
+        return cast(HttpResponse, self.endpoint(request))
+
+    @patch.object(SNSEndpoint, "handle_message")
+    @patch("django_sns_view.utils.get_x509_cert")
+    def test_deduplication_id_not_trusted(
+        self, get_cert: MagicMock, mock: MagicMock
+    ) -> None:
+        """Test a replay with a new MessageDeduplicationId is still a duplicate"""
+        get_cert.return_value = self.x509_cert
+        first = self.sns_notification.model_copy(
+            update={"MessageDeduplicationId": "order-1"}
+        )
+        replay = first.model_copy(update={"MessageDeduplicationId": "order-2"})
+        with override_settings(SNS_VERIFY_CERTIFICATE=True):
+            self.assertEqual(self._post(first).content.decode("ascii"), "OK")
+            response = self._post(replay)
+        self.assertEqual(response.content.decode("ascii"), "Duplicate Message")
+        mock.assert_called_once()
+
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_duplicate_not_handled(self, mock: MagicMock) -> None:
+        """Test a redelivered message is acknowledged without handling it"""
+        self.assertEqual(self._post().status_code, 200)
+        response = self._post()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode("ascii"), "Duplicate Message")
+        mock.assert_called_once()
+
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_redelivery_during_failing_attempt(self, mock: MagicMock) -> None:
+        """Test a redelivery isn't acknowledged while the first attempt runs"""
+        started, release = threading.Event(), threading.Event()
+
+        def fail_first(message: str, notification: Notification) -> None:
+            if mock.call_count == 1:
+                started.set()
+                release.wait(5)
+                raise ValueError("boom")
+
+        mock.side_effect = fail_first
+        errors: list[BaseException] = []
+
+        def first_attempt() -> None:
+            try:
+                self._post()
+            except ValueError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=first_attempt)
+        thread.start()
+        self.assertTrue(started.wait(5))
+        response = self._post()
+        release.set()
+        thread.join()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.content.decode("ascii"), "Message In Progress")
+        self.assertEqual(len(errors), 1)
+        # The first attempt failed, so the next redelivery is handled
+        self.assertEqual(self._post().content.decode("ascii"), "OK")
+        self.assertEqual(mock.call_count, 2)
+
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_failed_message_spooled(self, mock: MagicMock) -> None:
+        """Test a message whose handler failed is spooled and acknowledged"""
+        mock.side_effect = ValueError("boom")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        spool = FileSpool(os.path.join(directory.name, "sns.jsonl"))
+        self.endpoint = SNSEndpoint.as_view(
+            deduplicator=LocMemDeduplicator(), spool=spool
+        )
+        response = self._post()
+        self.assertEqual(response.content.decode("ascii"), "Spooled")
+        (record,) = spool.read(spool.path)
+        self.assertEqual(record.notification, self.sns_notification)
+        # The redelivery of a spooled message is a duplicate
+        self.assertEqual(self._post().content.decode("ascii"), "Duplicate Message")
+
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_failed_message_handled_again(self, mock: MagicMock) -> None:
+        """Test a redelivery of a message whose handler failed is handled"""
+        mock.side_effect = [ValueError("boom"), None]
+        with self.assertRaises(ValueError):
+            self._post()
+        self.assertEqual(self._post().content.decode("ascii"), "OK")
+        self.assertEqual(mock.call_count, 2)
+
+
+@override_settings(SNS_VERIFY_CERTIFICATE=False)
+class SNSEndpointBackgroundTestCase(SNSBaseTest):
+    def setUp(self) -> None:
+        self.executor = BackgroundExecutor(max_workers=1, max_pending=0)
+        self.addCleanup(self.executor.shutdown)
+        self.endpoint = SNSEndpoint.as_view(executor=self.executor)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def _post(self) -> HttpResponse:
+        request = RequestFactory().post("/")
+        request._body = self.sns_notification.model_dump_json().encode()
+        return cast(HttpResponse, self.endpoint(request))
+
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_acknowledged_before_handler_finishes(self, mock: MagicMock) -> None:
+        """Test the message is acknowledged while the handler still runs"""
+        mock.side_effect = lambda message, notification: self.release.wait()
+        response = self._post()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.executor.pending, 1)
+
+        self.release.set()
+        self.assertTrue(self.executor.drain(timeout=5))
+        mock.assert_called_once_with(
+            SNS_NOTIFICATION.get("Message"),
+            Notification.model_validate(SNS_NOTIFICATION),
+        )
+
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_queue_full(self, mock: MagicMock) -> None:
+        """Test a retryable error is returned when the queue is full"""
+        mock.side_effect = lambda message, notification: self.release.wait()
+        self.assertEqual(self._post().status_code, 200)
+        response = self._post()
+        self.assertEqual(response.status_code, 503)
+
+    @patch.object(SNSEndpoint, "handle_message_error")
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_handler_error_reported(self, mock: MagicMock, on_error: MagicMock) -> None:
+        """Test background handler failures are reported"""
+        error = ValueError("boom")
+        mock.side_effect = error
+        self.assertEqual(self._post().status_code, 200)
+        self.executor.drain(timeout=5)
+        on_error.assert_called_once_with(
+            error, Notification.model_validate(SNS_NOTIFICATION)
+        )
+
+
+@override_settings(SNS_VERIFY_CERTIFICATE=False)
+class SNSEndpointBatchTestCase(SNSBaseTest):
+    def _post(self, endpoint: Callable[..., HttpResponseBase]) -> HttpResponseBase:
+        request = RequestFactory().post("/")
+        request._body = self.sns_notification.model_dump_json().encode()
+        return endpoint(request)
+
+    @patch.object(SNSEndpoint, "handle_message")
+    @patch.object(SNSEndpoint, "handle_messages")
+    def test_handle_messages_called(
+        self, mock: MagicMock, handle_message: MagicMock
+    ) -> None:
+        """Test notifications are passed to handle_messages when batching"""
+        mock.return_value = None
+        endpoint = SNSEndpoint.as_view(batcher=MessageBatcher(max_wait=0))
+        response = self._post(endpoint)
+        self.assertEqual(response.status_code, 200)
+        mock.assert_called_once_with([self.sns_notification])
+        handle_message.assert_not_called()
+
+    @patch.object(SNSEndpoint, "handle_messages")
+    def test_failed_message_rejected(self, mock: MagicMock) -> None:
+        """Test a message reported as failed is retried by SNS"""
+        mock.return_value = [self.sns_notification.MessageId]
+        endpoint = SNSEndpoint.as_view(
+            batcher=MessageBatcher(max_wait=0), deduplicator=LocMemDeduplicator()
+        )
+        self.assertEqual(self._post(endpoint).status_code, 500)
+        mock.return_value = None
+        self.assertEqual(self._post(endpoint).status_code, 200)
+
+
+@override_settings(SNS_VERIFY_CERTIFICATE=False)
+class SNSEndpointRoutingTestCase(SNSBaseTest):
+    def setUp(self) -> None:
+        self.router = TopicRouter()
+        self.handler = MagicMock()
+        self.router.add("arn:aws:sns:ap-southeast-2:*:test-*", self.handler)
+        self.endpoint = SNSEndpoint.as_view(router=self.router)
+        self.request = RequestFactory().post("/")
+        self.request._body = self.sns_notification.model_dump_json().encode()
+
+    def test_routed_to_topic_handler(self) -> None:
+        """Test notifications are passed to the handler of their topic"""
+        self.request.META["HTTP_X_AMZ_SNS_TOPIC_ARN"] = self.sns_notification.TopicArn
+        response = self.endpoint(self.request)
+        self.assertEqual(response.status_code, 200)
+        self.handler.assert_called_once_with(
+            self.sns_notification.Message, self.sns_notification
+        )
+
+    def test_unrouted_topic_rejected(self) -> None:
+        """Test topics without a route are rejected"""
+        self.request.META["HTTP_X_AMZ_SNS_TOPIC_ARN"] = "arn:aws:sns:other"
+        response = cast(HttpResponse, self.endpoint(self.request))
+        self.assertEqual(response.content.decode("ascii"), "Bad Topic")
+        self.handler.assert_not_called()
+
+    def test_topic_header_required(self) -> None:
+        """Test the topic header is required when routing"""
+        response = cast(HttpResponse, self.endpoint(self.request))
+        self.assertEqual(response.content.decode("ascii"), "No TopicArn Header")
+
+
+@override_settings(SNS_VERIFY_CERTIFICATE=False)
+class SNSEndpointMessageModelTestCase(SNSBaseTest):
+    topic_header = ""
+
+    def _post(
+        self, endpoint: Callable[..., HttpResponseBase], message: str
+    ) -> HttpResponse:
+        request = RequestFactory().post("/")
+        if self.topic_header:
+            request.META["HTTP_X_AMZ_SNS_TOPIC_ARN"] = self.topic_header
+        notification = self.sns_notification.model_copy(update={"Message": message})
+        request._body = notification.model_dump_json().encode()
+        return cast(HttpResponse, endpoint(request))
+
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_message_parsed(self, mock: MagicMock) -> None:
+        """Test handle_message receives the message parsed into the model"""
+        endpoint = SNSEndpoint.as_view(message_model=Greeting)
+        response = self._post(endpoint, self.sns_notification.Message)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock.call_args.args[0], Greeting(hello="world"))
+
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_invalid_message_rejected(self, mock: MagicMock) -> None:
+        """Test messages that don't match the model are rejected"""
+        endpoint = SNSEndpoint.as_view(message_model=Greeting)
+        for message in ("not json", '{"hello": 1}', "[]"):
+            with self.subTest(message=message):
+                response = self._post(endpoint, message)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.content.decode("ascii"), "Invalid Message")
+        mock.assert_not_called()
+
+    def test_route_message_model(self) -> None:
+        """Test a route's message_model option takes precedence"""
+        router = TopicRouter()
+        handler = MagicMock()
+        router.add(self.sns_notification.TopicArn, handler, message_model=Event)
+        endpoint = SNSEndpoint.as_view(router=router, message_model=Greeting)
+        self.topic_header = self.sns_notification.TopicArn
+        response = self._post(endpoint, '{"kind": "refund", "id": 7}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(handler.call_args.args[0], Refund(kind="refund", id=7))
+        response = self._post(endpoint, '{"kind": "other", "id": 7}')
+        self.assertEqual(response.status_code, 400)
+        handler.assert_called_once()
+
+
+@override_settings(SNS_VERIFY_CERTIFICATE=False)
+class SNSEndpointFilterTestCase(SNSBaseTest):
+    def setUp(self) -> None:
+        self.metrics = InMemoryMetrics()
+        self.request = RequestFactory().post("/")
+        self.request._body = self.sns_notification.model_dump_json().encode()
+
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_filtered_message_acknowledged(self, mock: MagicMock) -> None:
+        """Test messages that don't match are acknowledged unhandled"""
+        endpoint = SNSEndpoint.as_view(
+            metrics=self.metrics,
+            filter_policy=FilterPolicy({"hello": ["moon"]}, scope="MessageBody"),
+        )
+        response = cast(HttpResponse, endpoint(self.request))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode("ascii"), "Filtered")
+        mock.assert_not_called()
+        self.assertEqual(self.metrics.get_count("filter_drops"), 1)
+
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_matching_message_handled(self, mock: MagicMock) -> None:
+        """Test messages that match are handled"""
+        endpoint = SNSEndpoint.as_view(
+            metrics=self.metrics,
+            filter_policy=FilterPolicy(
+                {"AWS.SNS.MOBILE.WNS.Type": [{"prefix": "wns/"}]}
+            ),
+        )
+        self.assertEqual(endpoint(self.request).status_code, 200)
+        mock.assert_called_once()
+        self.assertEqual(self.metrics.get_count("filter_matches"), 1)
+
+    def test_route_filter_policy(self) -> None:
+        """Test a route's filter_policy option takes precedence"""
+        router = TopicRouter()
+        handler = MagicMock()
+        router.add(
+            self.sns_notification.TopicArn,
+            handler,
+            filter_policy=FilterPolicy({"missing": [{"exists": True}]}),
+        )
+        endpoint = SNSEndpoint.as_view(router=router)
+        self.request.META["HTTP_X_AMZ_SNS_TOPIC_ARN"] = self.sns_notification.TopicArn
+        response = cast(HttpResponse, endpoint(self.request))
+        self.assertEqual(response.content.decode("ascii"), "Filtered")
+        handler.assert_not_called()
+
+
+@override_settings(SNS_VERIFY_CERTIFICATE=False)
+class SNSEndpointAdmissionTestCase(SNSBaseTest):
+    def setUp(self) -> None:
+        self.admission = AdmissionController(max_concurrent=1)
+        self.endpoint = SNSEndpoint.as_view(
+            admission=self.admission, deduplicator=LocMemDeduplicator()
+        )
+
+    def _post(self) -> HttpResponse:
+        request = RequestFactory().post("/")
+        request._body = self.sns_notification.model_dump_json().encode()
+        return cast(HttpResponse, self.endpoint(request))
+
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_overloaded(self, mock: MagicMock) -> None:
+        """Test a retryable error is returned over the concurrency limit"""
+        self.admission.acquire(self.sns_notification.TopicArn)
+        response = self._post()
+        self.assertEqual(response.status_code, 503)
+        mock.assert_not_called()
+
+        # The rejected message is handled when SNS retries it
+        self.admission.release(self.sns_notification.TopicArn)
+        self.assertEqual(self._post().content.decode("ascii"), "OK")
+        mock.assert_called_once()
+        self.assertEqual(self.admission.active, 0)
+
+    @patch.object(SNSEndpoint, "handle_message")
+    def test_slot_released_on_error(self, mock: MagicMock) -> None:
+        """Test a failing handler gives its slot back"""
+        mock.side_effect = ValueError("boom")
+        with self.assertRaises(ValueError):
+            self._post()
+        self.assertEqual(self.admission.active, 0)
+
+
+RAW_DELIVERY_AUTHORIZATION = "Basic " + base64.b64encode(b"sns:secret").decode()
+
+
+@override_settings(SNS_RAW_DELIVERY_CREDENTIALS=("sns", "secret"))
+class SNSEndpointRawDeliveryTestCase(SNSBaseTest):
+    def setUp(self) -> None:
+        self.endpoint = SNSEndpoint.as_view(
+            allow_raw_delivery=True,
+            topic_settings_key="SNS_STORY_TOPIC_ARN",
+            raw_delivery_credentials_settings_key="SNS_RAW_DELIVERY_CREDENTIALS",
+            deduplicator=LocMemDeduplicator(),
+        )
+        self.request = RequestFactory().post(
+            "/", b'{"raw": true}', content_type="application/json"
+        )
+        self.request.META["HTTP_X_AMZ_SNS_TOPIC_ARN"] = settings.SNS_STORY_TOPIC_ARN[0]  # type:ignore[misc]
+        self.request.META["HTTP_X_AMZ_SNS_MESSAGE_TYPE"] = "Notification"
+        self.request.META["HTTP_X_AMZ_SNS_RAWDELIVERY"] = "true"
+        self.request.META["HTTP_X_AMZ_SNS_MESSAGE_ID"] = SNS_NOTIFICATION["MessageId"]
+        self.request.META["HTTP_AUTHORIZATION"] = RAW_DELIVERY_AUTHORIZATION
+
+    @patch.object(SNSEndpoint, "handle_raw_message")
+    def test_raw_message_handled(self, mock: MagicMock) -> None:
+        """Test the raw body is passed to handle_raw_message unverified"""
+        response = self.endpoint(self.request)
+        self.assertEqual(response.status_code, 200)
+        body, notification = mock.call_args.args
+        self.assertEqual(body, b'{"raw": true}')
+        self.assertEqual(str(notification.MessageId), SNS_NOTIFICATION["MessageId"])
+        self.assertEqual(notification.TopicArn, settings.SNS_STORY_TOPIC_ARN[0])  # type:ignore[misc]
+
+    @patch.object(SNSEndpoint, "handle_raw_message")
+    def test_raw_message_deduplicated(self, mock: MagicMock) -> None:
+        """Test a redelivered raw message is only handled once"""
+        self.endpoint(self.request)
+        response = cast(HttpResponse, self.endpoint(self.request))
+        self.assertEqual(response.content.decode("ascii"), "Duplicate Message")
+        mock.assert_called_once()
+
+    def test_raw_delivery_not_allowed(self) -> None:
+        """Test raw messages are rejected unless enabled"""
+        response = cast(HttpResponse, SNSEndpoint.as_view()(self.request))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.content.decode("ascii"), "Raw Delivery Not Allowed")
+
+    def test_raw_delivery_requires_topic_allowlist(self) -> None:
+        """Test unsigned raw messages need a topic allowlist"""
+        endpoint = SNSEndpoint.as_view(
+            allow_raw_delivery=True,
+            raw_delivery_credentials_settings_key="SNS_RAW_DELIVERY_CREDENTIALS",
+        )
+        response = cast(HttpResponse, endpoint(self.request))
+        self.assertEqual(response.status_code, 400)
+
+    def test_raw_delivery_requires_credentials(self) -> None:
+        """Test unsigned raw messages need credentials to be configured"""
+        endpoint = SNSEndpoint.as_view(
+            allow_raw_delivery=True, topic_settings_key="SNS_STORY_TOPIC_ARN"
+        )
+        response = cast(HttpResponse, endpoint(self.request))
+        self.assertEqual(response.content.decode("ascii"), "Raw Delivery Not Allowed")
+
+    @patch.object(SNSEndpoint, "handle_raw_message")
+    def test_forged_raw_message_rejected(self, mock: MagicMock) -> None:
+        """Test raw messages without the right credentials are challenged"""
+        wrong = "Basic " + base64.b64encode(b"sns:guess").decode()
+        for authorization in (None, wrong, "Basic !!!", "Bearer secret"):
+            if authorization is None:
+                del self.request.META["HTTP_AUTHORIZATION"]
+            else:
+                self.request.META["HTTP_AUTHORIZATION"] = authorization
+            response = cast(HttpResponse, self.endpoint(self.request))
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response["WWW-Authenticate"], 'Basic realm="SNS"')
+        mock.assert_not_called()
+
+    def test_raw_delivery_bad_topic(self) -> None:
+        """Test raw messages from other topics are rejected"""
+        self.request.META["HTTP_X_AMZ_SNS_TOPIC_ARN"] = "arn:aws:sns:other"
+        response = cast(HttpResponse, self.endpoint(self.request))
+        self.assertEqual(response.content.decode("ascii"), "Bad Topic")
+
+    def test_raw_delivery_missing_message_id(self) -> None:
+        """Test raw messages without a message id are rejected"""
+        del self.request.META["HTTP_X_AMZ_SNS_MESSAGE_ID"]
+        response = cast(HttpResponse, self.endpoint(self.request))
+        self.assertEqual(response.content.decode("ascii"), "Invalid payload")
+
+
+@override_settings(SNS_VERIFY_CERTIFICATE=False)
+class AsyncSNSEndpointTestCase(SNSBaseTest):
+    def setUp(self) -> None:
+        self.factory = RequestFactory()
+        self.request = self.factory.post("/")
+        self.endpoint = cast(
+            Callable[[HttpRequest], Awaitable[HttpResponse]],
+            AsyncSNSEndpoint.as_view(),
+        )
+        self.request.META["HTTP_X_AMZ_SNS_TOPIC_ARN"] = settings.SNS_STORY_TOPIC_ARN[0]  # type:ignore[misc]
+        self.request.META["HTTP_X_AMZ_SNS_MESSAGE_TYPE"] = "Notification"
+
+    async def test_non_post_httpnotallowed(self) -> None:
+        """Test that GET requests to the async endpoint are not allowed"""
+        response = await self.endpoint(self.factory.get("/"))
+        self.assertIsInstance(response, HttpResponseNotAllowed)
+
+    @patch.object(AsyncSNSEndpoint, "handle_message", new_callable=AsyncMock)
+    async def test_handle_message_awaited(self, mock: AsyncMock) -> None:
+        """Test that the async handle message method is awaited"""
+        self.request._body = self.sns_notification.model_dump_json().encode()
+        response = await self.endpoint(self.request)
+        mock.assert_awaited_once_with(
+            SNS_NOTIFICATION.get("Message"),
+            Notification.model_validate(SNS_NOTIFICATION),
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @patch.object(AsyncSNSEndpoint, "handle_message", new_callable=AsyncMock)
+    async def test_message_model(self, mock: AsyncMock) -> None:
+        """Test the async endpoint parses messages into the message model"""
+        endpoint = cast(
+            Callable[[HttpRequest], Awaitable[HttpResponse]],
+            AsyncSNSEndpoint.as_view(message_model=Greeting),
+        )
+        self.request._body = self.sns_notification.model_dump_json().encode()
+        response = await endpoint(self.request)
+        self.assertEqual(response.status_code, 200)
+        mock.assert_awaited_once_with(Greeting(hello="world"), self.sns_notification)
+
+    @patch.object(AsyncSNSEndpoint, "handle_message", new_callable=AsyncMock)
+    async def test_failed_message_spooled(self, mock: AsyncMock) -> None:
+        """Test the async endpoint answers Spooled like the sync one"""
+        mock.side_effect = ValueError("boom")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        spool = FileSpool(os.path.join(directory.name, "sns.jsonl"))
+        endpoint = cast(
+            Callable[[HttpRequest], Awaitable[HttpResponse]],
+            AsyncSNSEndpoint.as_view(spool=spool),
+        )
+        self.request._body = self.sns_notification.model_dump_json().encode()
+        response = await endpoint(self.request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode("ascii"), "Spooled")
+        (record,) = spool.read(spool.path)
+        self.assertEqual(record.notification, self.sns_notification)
+
+    @override_settings(SNS_RAW_DELIVERY_CREDENTIALS=("sns", "secret"))
+    @patch.object(AsyncSNSEndpoint, "handle_raw_message", new_callable=AsyncMock)
+    async def test_raw_message_awaited(self, mock: AsyncMock) -> None:
+        """Test the async endpoint passes raw messages to handle_raw_message"""
+        endpoint = cast(
+            Callable[[HttpRequest], Awaitable[HttpResponse]],
+            AsyncSNSEndpoint.as_view(
+                allow_raw_delivery=True,
+                topic_settings_key="SNS_STORY_TOPIC_ARN",
+                raw_delivery_credentials_settings_key="SNS_RAW_DELIVERY_CREDENTIALS",
+            ),
+        )
+        self.request._body = b"raw message"
+        self.request.META["HTTP_X_AMZ_SNS_RAWDELIVERY"] = "true"
+        self.request.META["HTTP_AUTHORIZATION"] = RAW_DELIVERY_AUTHORIZATION
+        self.request.META["HTTP_X_AMZ_SNS_MESSAGE_ID"] = SNS_NOTIFICATION["MessageId"]
+        response = await endpoint(self.request)
+        self.assertEqual(response.status_code, 200)
+        mock.assert_awaited_once()
+        self.assertEqual(mock.call_args.args[0], b"raw message")
+
+    async def test_invalid_notification_json(self) -> None:
+        """Test the async endpoint rejects a body that isn't JSON"""
+        self.request._body = b"This Is Not JSON"
+        response = await self.endpoint(self.request)
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(SNS_VERIFY_CERTIFICATE=True)
+    @patch("django_sns_view.validation.averify_notification", new_callable=AsyncMock)
+    async def test_bad_signature(self, mock: AsyncMock) -> None:
+        """Test the async endpoint rejects an improperly signed message"""
+        mock.return_value = False
+        self.request._body = self.sns_notification.model_dump_json().encode()
+        response = await self.endpoint(self.request)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.content.decode("ascii"),
+            "Improper Signature",
+        )
+
+    @patch("django_sns_view.views.aconfirm_subscription", new_callable=AsyncMock)
+    async def test_aconfirm_subscription_called(self, mock: AsyncMock) -> None:
+        """Test SubscriptionConfirmation messages are confirmed asynchronously"""
+        mock.return_value = HttpResponse("OK")
+        self.request.META["HTTP_X_AMZ_SNS_MESSAGE_TYPE"] = "SubscriptionConfirmation"
+        self.request._body = self.sns_confirmation.model_dump_json().encode()
+        response = await self.endpoint(self.request)
+        mock.assert_awaited_once()
+        self.assertEqual(response.status_code, 200)
@@ -28,10 +28,33 @@ class UnsubscribeConfirmation(BaseSNSPayload):
     SubscribeURL: pydantic.HttpUrl
 
 
+class MessageAttribute(pydantic.BaseModel):
+    Type: str
+    Value: str
+
+
 class Notification(BaseSNSPayload):
     Type: Literal["Notification"]
     Subject: Optional[str] = None
     UnsubscribeURL: pydantic.HttpUrl
+    # Not part of the signed string
+    MessageAttributes: dict[str, MessageAttribute] = {}
+    # Only sent by FIFO topics, and not part of the signed string either
+    MessageGroupId: Optional[str] = None
+    SequenceNumber: Optional[str] = None
+    MessageDeduplicationId: Optional[str] = None
+
+
+class RawNotification(pydantic.BaseModel):
+    """
+    The envelope of a notification sent with raw message delivery, which SNS
+    sends as headers alongside the bare message. Raw messages aren't signed.
+    """
+
+    Type: Literal["Notification"] = "Notification"
+    MessageId: uuid.UUID
+    TopicArn: str
+    SubscriptionArn: Optional[str] = None
 
 
 type AnySNSPayload = SubscriptionConfirmation | UnsubscribeConfirmation | Notification
@@ -1,19 +1,27 @@
-from functools import lru_cache
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any
+import hashlib
+import importlib
 import logging
 import re
+import threading
 
-from cryptography import x509
-from cryptography.exceptions import InvalidSignature
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import padding
-from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
 from django.conf import settings
 from django.http import HttpResponse, HttpResponseBadRequest
 from django.utils.encoding import smart_bytes
-from requests.exceptions import HTTPError
-import requests
 
-from .types import AnySNSPayload, SubscriptionConfirmation
+from .bundle import UnknownCertificateError, get_cert_bundle
+from .metrics import NULL_METRICS, BaseMetrics
+
+# cryptography, requests and pydantic are only imported once a message is
+# verified, so importing the views stays cheap. See warmup.
+if TYPE_CHECKING:
+    from cryptography import x509
+
+    from .types import AnySNSPayload, SubscriptionConfirmation
 
 logger = logging.getLogger(__name__)
 
@@ -60,25 +68,127 @@ Type
 """
 
 
-def confirm_subscription(payload: SubscriptionConfirmation) -> HttpResponse:
+# The fields each message type signs, in the order they are signed
+NOTIFICATION_SIGNED_FIELDS = (
+    "Message",
+    "MessageId",
+    "Subject",
+    "Timestamp",
+    "TopicArn",
+    "Type",
+)
+NOTIFICATION_SIGNED_FIELDS_NO_SUBJECT = (
+    "Message",
+    "MessageId",
+    "Timestamp",
+    "TopicArn",
+    "Type",
+)
+SUBSCRIPTION_SIGNED_FIELDS = (
+    "Message",
+    "MessageId",
+    "SubscribeURL",
+    "Timestamp",
+    "Token",
+    "TopicArn",
+    "Type",
+)
+
+
+def iter_signing_string(payload: AnySNSPayload) -> Iterator[bytes]:
     """
-    Confirm subscription request by making a
-    get request to the required url.
+    Yield the string SNS signed for payload in chunks, as an equivalent of
+    the *_HASH_FORMAT templates that only reads the signed fields and
+    doesn't copy the message into an intermediate string.
+    """
+    fields: tuple[str, ...]
+    if payload.Type == "Notification":
+        if payload.Subject is not None:
+            fields = NOTIFICATION_SIGNED_FIELDS
+        else:
+            fields = NOTIFICATION_SIGNED_FIELDS_NO_SUBJECT
+    else:
+        fields = SUBSCRIPTION_SIGNED_FIELDS
+    for field in fields:
+        value = getattr(payload, field)
+        yield b"%s\n" % field.encode("ascii")
+        yield (value if isinstance(value, str) else str(value)).encode("utf-8")
+        yield b"\n"
+
+
+def build_signing_string(payload: AnySNSPayload) -> bytes:
+    """
+    Return the string SNS signed for payload.
     """
+    return b"".join(iter_signing_string(payload))
+
+
+def has_plain_authority(url: Any) -> bool:
+    """
+    Return whether url has no userinfo and the default port of its scheme,
+    so that a host check covers everything it could connect to.
+    """
+    default_port = {"http": 80, "https": 443}.get(url.scheme)
+    return not url.username and not url.password and url.port == default_port
+
+
+def check_subscribe_domain(
+    payload: SubscriptionConfirmation,
+) -> HttpResponseBadRequest | None:
     pattern = getattr(
         settings,
         "SNS_SUBSCRIBE_DOMAIN_REGEX",
         r"sns.[a-z0-9\-]+.amazonaws.com$",
     )
-    if not payload.SubscribeURL.host or not re.search(
-        pattern, payload.SubscribeURL.host
-    ):
+    url = payload.SubscribeURL
+    if not url.host or not re.search(pattern, url.host) or not has_plain_authority(url):
         logger.error("Invalid Subscription Domain %s", payload.SubscribeURL)
         return HttpResponseBadRequest("Improper Subscription Domain")
+    return None
+
+
+def confirm_subscription(payload: SubscriptionConfirmation) -> HttpResponse:
+    """
+    Confirm subscription request by making a
+    get request to the required url.
+    """
+    from requests.exceptions import HTTPError
+
+    from .client import get_http_client
+
+    rejection = check_subscribe_domain(payload)
+    if rejection is not None:
+        return rejection
+
+    try:
+        get_http_client().get(str(payload.SubscribeURL))
+    except HTTPError as e:
+        logger.error(
+            "HTTP verification Error",
+            extra={
+                "error": e,
+                "sns_payload": payload,
+            },
+        )
+        raise e
+
+    return HttpResponse("OK")
+
+
+async def aconfirm_subscription(payload: SubscriptionConfirmation) -> HttpResponse:
+    """
+    Async version of confirm_subscription that doesn't block the event loop.
+    """
+    from requests.exceptions import HTTPError
+
+    from .client import get_http_client
+
+    rejection = check_subscribe_domain(payload)
+    if rejection is not None:
+        return rejection
 
     try:
-        response = requests.get(str(payload.SubscribeURL))
-        response.raise_for_status()
+        await get_http_client().aget(str(payload.SubscribeURL))
     except HTTPError as e:
         logger.error(
             "HTTP verification Error",
@@ -92,22 +202,86 @@ def confirm_subscription(payload: SubscriptionConfirmation) -> HttpResponse:
     return HttpResponse("OK")
 
 
-def verify_notification(payload: AnySNSPayload) -> bool:
+def verify_notification(
+    payload: AnySNSPayload, metrics: BaseMetrics = NULL_METRICS
+) -> bool:
     """
     Verify notification came from a trusted source
     Returns True if verified, False if not
     """
-    cert = get_x509_cert(str(payload.SigningCertURL))
-    public_key = cert.public_key()
-    if payload.Type == "Notification":
-        if payload.Subject is not None:
-            hash_format = NOTIFICATION_HASH_FORMAT
-        else:
-            hash_format = NOTIFICATION_HASH_FORMAT_NO_SUBJECT
-    else:
-        hash_format = SUBSCRIPTION_HASH_FORMAT
-    message = hash_format.format(**payload.model_dump()).encode("utf-8")
+    with metrics.timer("cert_fetch"):
+        cert = get_x509_cert(str(payload.SigningCertURL), metrics)
+    with metrics.timer("verify"):
+        return _verify_with_cert(payload, cert, metrics)
+
 
+async def averify_notification(
+    payload: AnySNSPayload, metrics: BaseMetrics = NULL_METRICS
+) -> bool:
+    """
+    Async version of verify_notification. Only the certificate fetch is
+    awaited, the signature check itself is CPU bound.
+    """
+    with metrics.timer("cert_fetch"):
+        cert = await aget_x509_cert(str(payload.SigningCertURL), metrics)
+    with metrics.timer("verify"):
+        return _verify_with_cert(payload, cert, metrics)
+
+
+class VerifiedSignatureCache:
+    """
+    Remember signatures that were successfully verified, so redeliveries of
+    a message skip the public key operation. Entries are keyed by the
+    certificate URL, the signature and the digest of the signed string,
+    evicting the least recently used once max_size is reached. max_size
+    defaults to the SNS_VERIFIED_SIGNATURE_CACHE_SIZE setting, 0 disables
+    the cache.
+    """
+
+    def __init__(self, max_size: int | None = None) -> None:
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[str, bytes, bytes], None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, key: tuple[str, bytes, bytes]) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, key: tuple[str, bytes, bytes]) -> None:
+        max_size = self.max_size
+        if max_size is None:
+            max_size = getattr(settings, "SNS_VERIFIED_SIGNATURE_CACHE_SIZE", 1024)
+        if max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = None
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+verified_signatures = VerifiedSignatureCache()
+
+
+def _verify_with_cert(
+    payload: AnySNSPayload,
+    cert: x509.Certificate,
+    metrics: BaseMetrics = NULL_METRICS,
+) -> bool:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+    from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+    from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
+
+    public_key = cert.public_key()
     hash_type: hashes.SHA1 | hashes.SHA256
     if payload.SignatureVersion == "1":
         hash_type = hashes.SHA1()
@@ -115,33 +289,145 @@ def verify_notification(payload: AnySNSPayload) -> bool:
         hash_type = hashes.SHA256()
     else:
         raise ValueError("Unknown SignatureVersion: %s" % payload.SignatureVersion)
+
+    # Decoders may only decode the signature when it's accessed
+    try:
+        signature = payload.Signature
+    except ValueError as e:
+        logger.error("Invalid signature: %s", e)
+        return False
+
+    # The digest is needed for the verification anyway, so hash once and
+    # use it both as the cache key and to verify against
+    hasher = hashlib.new(hash_type.name)
+    for chunk in iter_signing_string(payload):
+        hasher.update(chunk)
+    digest = hasher.digest()
+    cache_key = (str(payload.SigningCertURL), signature, digest)
+    if verified_signatures.check(cache_key):
+        metrics.increment("signature_cache_hits")
+        return True
+
     pss = padding.PKCS1v15()
     try:
         if not isinstance(public_key, RSAPublicKey):
             raise ValueError("Unknown key type: %s" % public_key)
-        public_key.verify(payload.Signature, message, pss, hash_type)
+        public_key.verify(signature, digest, pss, Prehashed(hash_type))
     except InvalidSignature as e:
         logger.error("Verification of signature raised an Error: %s", e)
         return False
+    verified_signatures.add(cache_key)
     return True
 
 
-@lru_cache(maxsize=128)
-def get_x509_cert(cert_url: str) -> x509.Certificate:
+def get_x509_cert(
+    cert_url: str, metrics: BaseMetrics = NULL_METRICS
+) -> x509.Certificate:
     """
     Acquire the keyfile
     SNS keys expire and Amazon does not promise they will use the same key
     for all SNS requests. So we need to keep a copy of the cert in our
-    cache
+    cache, see the SNS_CERT_STORE setting.
+    """
+    from .certs import get_cert_store
+
+    fetched = False
+
+    def fetch(url: str) -> bytes:
+        nonlocal fetched
+        fetched = True
+        return _fetch_pem(url)
+
+    cert = get_cert_store().get_certificate(cert_url, fetch)
+    metrics.increment("cert_cache_misses" if fetched else "cert_cache_hits")
+    return cert
+
+
+async def aget_x509_cert(
+    cert_url: str, metrics: BaseMetrics = NULL_METRICS
+) -> x509.Certificate:
     """
+    Async version of get_x509_cert, the certificate is fetched without
+    blocking the event loop.
+    """
+    from .certs import get_cert_store
+
+    fetched = False
+
+    async def fetch(url: str) -> bytes:
+        nonlocal fetched
+        fetched = True
+        return await _afetch_pem(url)
+
+    cert = await get_cert_store().aget_certificate(cert_url, fetch)
+    metrics.increment("cert_cache_misses" if fetched else "cert_cache_hits")
+    return cert
+
+
+def _get_bundled_pem(cert_url: str) -> bytes | None:
+    pem = get_cert_bundle().get(cert_url)
+    if pem is None and not getattr(settings, "SNS_CERT_NETWORK_FALLBACK", True):
+        raise UnknownCertificateError("Certificate %s is not in the bundle" % cert_url)
+    return pem
+
+
+def _fetch_pem(cert_url: str) -> bytes:
+    from requests.exceptions import HTTPError
+
+    from .client import get_http_client
+
+    pem = _get_bundled_pem(cert_url)
+    if pem is not None:
+        return pem
     try:
-        response = requests.get(cert_url)
-        response.raise_for_status()
+        response = get_http_client().get(cert_url)
     except HTTPError as e:
         logger.error("Unable to fetch the keyfile: %s" % e)
         raise
-    pemfile = smart_bytes(response.text)
-    # Extract the first certificate in the file and confirm it's a valid
-    # PEM certificate
-    cert = x509.load_pem_x509_certificate(pemfile)
-    return cert
+    return smart_bytes(response.text)
+
+
+async def _afetch_pem(cert_url: str) -> bytes:
+    from requests.exceptions import HTTPError
+
+    from .client import get_http_client
+
+    pem = _get_bundled_pem(cert_url)
+    if pem is not None:
+        return pem
+    try:
+        return await get_http_client().aget(cert_url)
+    except HTTPError as e:
+        logger.error("Unable to fetch the keyfile: %s" % e)
+        raise
+
+
+# What verifying and confirming a message imports on first use
+WARMUP_MODULES = (
+    "pydantic_core",
+    "django_sns_view.types",
+    "django_sns_view.client",
+    "django_sns_view.certs",
+    "cryptography.exceptions",
+    "cryptography.hazmat.primitives.hashes",
+    "cryptography.hazmat.primitives.asymmetric.padding",
+    "cryptography.hazmat.primitives.asymmetric.rsa",
+    "cryptography.hazmat.primitives.asymmetric.utils",
+)
+
+
+def warmup() -> None:
+    """
+    Import and set up what verifying a message needs, so a web worker pays
+    for it when it starts rather than on its first request. Called from
+    AppConfig.ready when the SNS_WARMUP setting is True.
+    """
+    from .certs import get_cert_store
+    from .client import get_http_client
+
+    for name in WARMUP_MODULES:
+        importlib.import_module(name)
+    get_cert_store()
+    # Sets up the connection pool
+    get_http_client().session
+    get_cert_bundle()
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from collections.abc import Collection, Container
+from typing import TYPE_CHECKING
+import logging
+import re
+
+from .bundle import UnknownCertificateError
+from .decoders import BaseDecoder, DecodeError, PydanticDecoder
+from .metrics import NULL_METRICS, BaseMetrics
+from .utils import averify_notification, has_plain_authority, verify_notification
+
+if TYPE_CHECKING:
+    from .types import AnySNSPayload
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CERT_DOMAIN_PATTERN = r"sns.[a-z0-9\-]+.amazonaws.com$"
+MESSAGE_TYPES = (
+    "Notification",
+    "SubscriptionConfirmation",
+    "UnsubscribeConfirmation",
+)
+
+
+class InvalidMessage(Exception):
+    """
+    Raised by MessageValidator for a message that won't be handled, with
+    the reason it was rejected and the HTTP status to reject it with.
+    """
+
+    def __init__(self, reason: str, status: int = 400) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+
+
+class MessageValidator:
+    """
+    The checks an SNS message goes through before it is handled, whether it
+    was pushed to an SNSEndpoint or pulled from an SQS queue.
+
+    decode parses the message, check makes sure its type and topic are
+    accepted and its signing certificate is hosted by SNS, and verify checks
+    its signature. Each raises InvalidMessage if the message is rejected.
+    Only TopicArns in topic_allowlist and router are accepted, when given.
+    """
+
+    def __init__(
+        self,
+        decoder: BaseDecoder | None = None,
+        message_types: Collection[str] = MESSAGE_TYPES,
+        topic_allowlist: Container[str] | None = None,
+        router: Container[str] | None = None,
+        cert_domain_pattern: str = DEFAULT_CERT_DOMAIN_PATTERN,
+        verify_certificate: bool = True,
+        metrics: BaseMetrics = NULL_METRICS,
+    ) -> None:
+        self.decoder = decoder or PydanticDecoder()
+        self.message_types = message_types
+        self.topic_allowlist = topic_allowlist
+        self.router = router
+        self.cert_domain_pattern = cert_domain_pattern
+        self.verify_certificate = verify_certificate
+        self.metrics = metrics
+
+    def validate(self, body: bytes) -> AnySNSPayload:
+        payload = self.decode(body)
+        self.check(payload)
+        self.verify(payload)
+        return payload
+
+    async def avalidate(self, body: bytes) -> AnySNSPayload:
+        payload = self.decode(body)
+        self.check(payload)
+        await self.averify(payload)
+        return payload
+
+    def decode(self, body: bytes) -> AnySNSPayload:
+        try:
+            with self.metrics.timer("parse"):
+                payload = self.decoder.decode(body)
+        except DecodeError:
+            logger.exception("Invalid payload")
+            raise InvalidMessage("Invalid payload") from None
+        self.metrics.increment("messages", type=payload.Type)
+        return payload
+
+    def check(self, payload: AnySNSPayload) -> None:
+        """
+        Run the checks that don't need any I/O.
+        """
+        if payload.Type not in self.message_types:
+            raise InvalidMessage("Bad Message Type")
+        for topics in (self.topic_allowlist, self.router):
+            if topics is not None and payload.TopicArn not in topics:
+                logger.warning("Topic %s isn't allowed", payload.TopicArn)
+                raise InvalidMessage("Bad Topic")
+
+        # Confirm that the signing certificate is hosted on a correct domain
+        # AWS by default uses sns.{region}.amazonaws.com
+        with self.metrics.timer("domain_check"):
+            url = payload.SigningCertURL
+            valid_domain = (
+                url.host
+                and re.search(self.cert_domain_pattern, url.host)
+                and has_plain_authority(url)
+            )
+        if not valid_domain:
+            logger.warning(
+                "Improper Certificate Location %s",
+                payload.SigningCertURL,
+            )
+            raise InvalidMessage("Improper Certificate Location")
+
+    def verify(self, payload: AnySNSPayload) -> None:
+        """
+        Verify that the message is signed by Amazon.
+        """
+        if not self.verify_certificate:
+            return
+        try:
+            verified = verify_notification(payload, self.metrics)
+        except UnknownCertificateError as e:
+            logger.warning("%s", e)
+            raise InvalidMessage("Unknown Certificate") from None
+        if not verified:
+            logger.error("Cert verification failed")
+            raise InvalidMessage("Improper Signature")
+
+    async def averify(self, payload: AnySNSPayload) -> None:
+        if not self.verify_certificate:
+            return
+        try:
+            verified = await averify_notification(payload, self.metrics)
+        except UnknownCertificateError as e:
+            logger.warning("%s", e)
+            raise InvalidMessage("Unknown Certificate") from None
+        if not verified:
+            logger.error("Cert verification failed")
+            raise InvalidMessage("Improper Signature")